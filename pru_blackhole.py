@@ -43,7 +43,7 @@ def compute_forces_and_black_holes(positions, velocities, masses):
     net_forces = np.sum(force_vectors, axis=1)
 
     # Compute kinetic and potential energy
-    kinetic_energy = 0.5 * masses * np.sum(velocities**2, axis=1)
+    kinetic_E = 0.5 * np.einsum('i,ij,ij->', masses, velocities, velocities, optimize='greedy')
     potential_energy = -0.5 * np.sum(force_magnitude * distances, axis=1)
 
     # Check for black hole formation using Schwarzschild radius
@@ -56,7 +56,7 @@ def compute_forces_and_black_holes(positions, velocities, masses):
         if collapse:
             black_hole_events.append((i, schwarzschild_radii[i]))
 
-    return net_forces, np.sum(kinetic_energy), np.sum(potential_energy)
+    return net_forces, kinetic_E, np.sum(potential_energy)
 
 # Tracking results
 for t in range(time_steps):
@@ -1,6 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.spatial import KDTree
+from scipy.spatial import cKDTree
 
 # -------------------- Optimized PRU 2.0 Simulation -------------------- #
 # Includes emergent consciousness, O(N) scaling, adaptive constants, 
@@ -67,9 +67,9 @@ num_steps = 100
 
 for step in range(num_steps):
     positions = np.array([p.position for p in particles])
-    tree = KDTree(positions)  # Efficient nearest neighbor search
-    for p in particles:
-        _, indices = tree.query(p.position, k=10)  # Get 10 nearest neighbors
+    # Efficient nearest neighbor search: 10 nearest neighbors of every particle in one parallel query
+    _, all_indices = cKDTree(positions).query(positions, k=10, workers=-1)
+    for p, indices in zip(particles, all_indices):
         neighbors = [particles[i] for i in indices if i != p.id]  # Avoid self
         p.update(neighbors)
 
@@ -1,7 +1,7 @@
 import pygame
 import numpy as np
 import sys
-from scipy.spatial import KDTree
+from scipy.spatial import cKDTree
 
 # -------------------- Fundamental Constants & PRU Derived Values -------------------- #
 # Given (SI) values:
@@ -184,11 +184,10 @@ while running:
                 draw_trails = not draw_trails
 
     if not paused:
-        # Update particles using KDTree for neighbor search.
+        # Update particles using KDTree for neighbor search (all particles in one parallel query).
         positions = np.array([p.position for p in particles])
-        tree = KDTree(positions)
-        for p in particles:
-            _, indices = tree.query(p.position, k=10)
+        _, all_indices = cKDTree(positions).query(positions, k=10, workers=-1)
+        for p, indices in zip(particles, all_indices):
             neighbors = [particles[i] for i in indices if i != p.id]
             p.update(neighbors, dt)
         step_count += 1
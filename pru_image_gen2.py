@@ -6,7 +6,7 @@ import random
 import matplotlib.pyplot as plt
 from skimage import io
 from skimage.color import rgb2lab, lab2rgb
-from scipy.spatial import KDTree
+from scipy.spatial import cKDTree
 
 # ============================================
 # PRU Image Knowledge System
@@ -40,7 +40,7 @@ class PRU_Image_Generator:
         image = cv2.resize(image, (256, 256))  # Standardize size
         lab_image = rgb2lab(image)  # Convert to LAB color space for better similarity
         pixel_data = lab_image.reshape(-1, 3)  # Flatten pixels
-        tree = KDTree(pixel_data)  # Efficient nearest neighbor search
+        tree = cKDTree(pixel_data)  # Efficient nearest neighbor search
 
         # Store image metadata
         self.image_database[label] = {
@@ -51,8 +51,8 @@ class PRU_Image_Generator:
         }
 
         # Build PRU relational graph (connecting similar colors)
-        for i in range(len(pixel_data)):
-            neighbors = tree.query(pixel_data[i], k=5)[1]  # Find closest neighbors
+        all_neighbors = tree.query(pixel_data, k=5, workers=-1)[1]  # Find closest neighbors of every pixel
+        for i, neighbors in enumerate(all_neighbors.tolist()):
             for n in neighbors:
                 self.graph.add_edge(f"{label}_{i}", f"{label}_{n}", weight=1.0)
 
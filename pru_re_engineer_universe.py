@@ -1,3 +1,4 @@
+import math
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -64,7 +65,8 @@ def update_positions(objects):
             if i == j:
                 continue
             r_vec = positions[j] - positions[i]
-            distance = np.linalg.norm(r_vec) + 1e-6  # Avoid division by zero
+            dx, dy, dz = r_vec
+            distance = math.sqrt(dx * dx + dy * dy + dz * dz + 1e-12)  # Softened: avoids division by zero
 
             # **Emergent Gravity (Relational G)**
             force_mag = G_PRU * masses[i] * masses[j] / distance**2
@@ -76,8 +78,10 @@ def update_positions(objects):
 
             # **Light Speed Limit (PRU-c)**
             speed_limit = C_PRU * dt
-            if np.linalg.norm(force) > speed_limit:
-                force = (force / np.linalg.norm(force)) * speed_limit
+            fx, fy, fz = force
+            force_norm = math.sqrt(fx * fx + fy * fy + fz * fz)
+            if force_norm > speed_limit:
+                force *= speed_limit / force_norm
 
             net_force += force
 
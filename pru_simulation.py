@@ -2,7 +2,6 @@ import pygame
 import numpy as np
 import math
 import random
-from scipy.spatial import KDTree
 from numba import jit
 
 # =============================================================================
@@ -18,6 +17,7 @@ EULER_IDENTITY = math.e ** (1j * math.pi) + 1
 
 WIDTH, HEIGHT = 1200, 800  # Screen dimensions
 FPS = 60
+OVERLAY_REFRESH_FRAMES = 10  # Re-render the debug overlay text every N frames
 DT = 86400  # Base time step: 1 day (in seconds)
 time_speed = 1.0  # Multiplier for time progression
 
@@ -29,6 +29,10 @@ QUANTUM_JITTER = 0.0  # No jitter for a clean simulation
 QUANTUM_SCALE = 1  # Discrete space unit
 ENTANGLEMENT_COEFF = 0.0  # Disabled in this simulation for realism
 NUM_RANDOM_PARTICLES = 100
+# Barnes–Hut gravity
+BH_THETA = 0.5  # Opening angle: cells with size/distance below this are treated as one mass
+BH_MIN_PARTICLES = 64  # Below this, direct summation is cheaper than building a tree
+BH_MAX_DEPTH = 32  # Bodies that still share a cell at this depth are kept in one leaf
 # For adding radiation pressure (if desired, here we keep it off)
 R_PRESSURE = 0.005
 LIGHT_EFFECT_RADIUS = 150
@@ -87,6 +91,9 @@ screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("PRU-Controlled Universe Sandbox")
 clock = pygame.time.Clock()
 font = pygame.font.SysFont("Arial", 18)
+# Only queue the events main() handles (mouse motion etc. never reach the queue)
+pygame.event.set_blocked(None)
+pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL])
 
 # Camera for cosmic view
 camera_x, camera_y = WIDTH / 2, HEIGHT / 2
@@ -101,6 +108,11 @@ lights = []
 # Pre-generate a star field (for the galaxy background)
 NUM_STARS = 300
 stars = [(random.randint(0, WIDTH), random.randint(0, HEIGHT)) for _ in range(NUM_STARS)]
+# The star field is static, so rasterize it once and blit it every frame
+STARFIELD = pygame.Surface((WIDTH, HEIGHT))
+STARFIELD.fill(BLACK)
+for star in stars:
+    pygame.draw.circle(STARFIELD, WHITE, star, 1)
 
 
 # =============================================================================
@@ -118,47 +130,210 @@ class Particle:
         self.fixed = fixed  # Fixed bodies (like the Sun) don't move
         self.size = visual_radius  # Visual size for drawing
         self.trail = []  # (Trails are not drawn in this version)
+        self.acceleration = None  # Cached between Verlet steps (None until first computed)
 
-    def draw(self, surface):
-        x_screen = int((self.position[0] - camera_x) * zoom + WIDTH / 2)
-        y_screen = int((self.position[1] - camera_y) * zoom + HEIGHT / 2)
-        pygame.draw.circle(surface, self.color, (x_screen, y_screen), max(1, int(self.size * zoom)))
+    def draw(self, surface, screen_pos):
+        pygame.draw.circle(surface, self.color, screen_pos, max(1, int(self.size * zoom)))
+
+
+def world_to_screen(positions):
+    # Positions stay float64 for the integrator; the draw path only needs float32 -> int32 pixels
+    screen_xy = (np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+                 - np.array([camera_x, camera_y], dtype=np.float32)) * np.float32(zoom) \
+                + np.array([WIDTH / 2, HEIGHT / 2], dtype=np.float32)
+    return screen_xy.astype(np.int32)
 
 
 # =============================================================================
-# Vectorized PRU Update Function using KDTree and Numba acceleration
+# PRU Gravity: Barnes–Hut Quadtree (direct summation for small N), Numba-accelerated
 # =============================================================================
 @jit(nopython=True)
-def compute_force(pos, neighbor_pos, neighbor_mass, G_val, eps):
-    total = np.zeros(2)
-    for k in range(neighbor_pos.shape[0]):
-        diff0 = neighbor_pos[k, 0] - pos[0]
-        diff1 = neighbor_pos[k, 1] - pos[1]
-        dist = math.sqrt(diff0 * diff0 + diff1 * diff1) + eps
-        total[0] += G_val * neighbor_mass[k] * diff0 / (dist * dist * dist)
-        total[1] += G_val * neighbor_mass[k] * diff1 / (dist * dist * dist)
-    return total
+def direct_sum_accelerations(positions, masses, G_val, eps):
+    n = positions.shape[0]
+    acc = np.zeros((n, 2))
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                continue
+            diff0 = positions[j, 0] - positions[i, 0]
+            diff1 = positions[j, 1] - positions[i, 1]
+            dist = math.sqrt(diff0 * diff0 + diff1 * diff1) + eps
+            f = G_val * masses[j] / (dist * dist * dist)
+            acc[i, 0] += f * diff0
+            acc[i, 1] += f * diff1
+    return acc
+
+
+@jit(nopython=True)
+def build_quadtree(positions, masses):
+    """Build a flat quadtree: per-node children, leaf body lists, total mass, centre of mass and size."""
+    n = positions.shape[0]
+    cap = 4 * n + 16
+    children = -np.ones((cap, 4), dtype=np.int64)
+    body = -np.ones(cap, dtype=np.int64)  # Head of the leaf's body list, -1 for internal nodes
+    next_body = -np.ones(n, dtype=np.int64)  # Bodies sharing a leaf at BH_MAX_DEPTH
+    center = np.empty((cap, 2))
+    half = np.empty(cap)
+    depth = np.zeros(cap, dtype=np.int64)
+
+    xmin, ymin = positions[:, 0].min(), positions[:, 1].min()
+    xmax, ymax = positions[:, 0].max(), positions[:, 1].max()
+    center[0, 0] = 0.5 * (xmin + xmax)
+    center[0, 1] = 0.5 * (ymin + ymax)
+    half[0] = 0.5 * max(xmax - xmin, ymax - ymin) + 1e-9
+    count = 1
+
+    for b in range(n):
+        node = 0
+        new_body = b
+        while new_body >= 0:
+            resident = body[node]
+            if resident >= 0 and depth[node] >= BH_MAX_DEPTH:
+                # (Near-)coincident bodies: keep them together in this leaf
+                next_body[new_body] = resident
+                body[node] = new_body
+                break
+            if resident >= 0:
+                # Split the leaf: push its resident body one level down, then retry here
+                body[node] = -1
+                inserting = resident
+            else:
+                inserting = new_body
+            q = (1 if positions[inserting, 0] >= center[node, 0] else 0) + \
+                (2 if positions[inserting, 1] >= center[node, 1] else 0)
+            child = children[node, q]
+            if child >= 0 and inserting == new_body:
+                node = child
+                continue
+            if count == cap:
+                cap *= 2
+                grown_children = -np.ones((cap, 4), dtype=np.int64)
+                grown_children[:count] = children[:count]
+                children = grown_children
+                grown_body = -np.ones(cap, dtype=np.int64)
+                grown_body[:count] = body[:count]
+                body = grown_body
+                grown_center = np.empty((cap, 2))
+                grown_center[:count] = center[:count]
+                center = grown_center
+                grown_half = np.empty(cap)
+                grown_half[:count] = half[:count]
+                half = grown_half
+                grown_depth = np.zeros(cap, dtype=np.int64)
+                grown_depth[:count] = depth[:count]
+                depth = grown_depth
+            h = 0.5 * half[node]
+            center[count, 0] = center[node, 0] + (h if q & 1 else -h)
+            center[count, 1] = center[node, 1] + (h if q & 2 else -h)
+            half[count] = h
+            depth[count] = depth[node] + 1
+            body[count] = inserting
+            children[node, q] = count
+            count += 1
+            if inserting == new_body:
+                new_body = -1
+
+    # Children are always created after their parent, so a reverse sweep accumulates bottom-up
+    node_mass = np.zeros(count)
+    com = np.zeros((count, 2))
+    for node in range(count - 1, -1, -1):
+        b = body[node]
+        while b >= 0:
+            node_mass[node] += masses[b]
+            com[node, 0] += masses[b] * positions[b, 0]
+            com[node, 1] += masses[b] * positions[b, 1]
+            b = next_body[b]
+        for q in range(4):
+            child = children[node, q]
+            if child >= 0:
+                node_mass[node] += node_mass[child]
+                com[node, 0] += com[child, 0]
+                com[node, 1] += com[child, 1]
+    for node in range(count):
+        if node_mass[node] > 0:
+            com[node, 0] /= node_mass[node]
+            com[node, 1] /= node_mass[node]
+    return children[:count], body[:count], next_body, node_mass, com, 2.0 * half[:count]
+
+
+@jit(nopython=True)
+def barnes_hut_accelerations(positions, masses, children, body, next_body, node_mass, com, size,
+                             G_val, eps, theta):
+    n = positions.shape[0]
+    acc = np.zeros((n, 2))
+    stack = np.empty(4 * (BH_MAX_DEPTH + 2), dtype=np.int64)
+    for i in range(n):
+        ax = 0.0
+        ay = 0.0
+        stack[0] = 0
+        top = 1
+        while top > 0:
+            top -= 1
+            node = stack[top]
+            b = body[node]
+            if b >= 0:
+                # Leaf: sum its bodies directly
+                while b >= 0:
+                    if b != i:
+                        diff0 = positions[b, 0] - positions[i, 0]
+                        diff1 = positions[b, 1] - positions[i, 1]
+                        dist = math.sqrt(diff0 * diff0 + diff1 * diff1) + eps
+                        f = G_val * masses[b] / (dist * dist * dist)
+                        ax += f * diff0
+                        ay += f * diff1
+                    b = next_body[b]
+                continue
+            diff0 = com[node, 0] - positions[i, 0]
+            diff1 = com[node, 1] - positions[i, 1]
+            dist = math.sqrt(diff0 * diff0 + diff1 * diff1) + eps
+            if size[node] < theta * dist:
+                # Far enough away: treat the whole cell as a single mass at its centre of mass
+                f = G_val * node_mass[node] / (dist * dist * dist)
+                ax += f * diff0
+                ay += f * diff1
+            else:
+                for q in range(4):
+                    child = children[node, q]
+                    if child >= 0:
+                        stack[top] = child
+                        top += 1
+        acc[i, 0] = ax
+        acc[i, 1] = ay
+    return acc
+
+
+def compute_accelerations(positions):
+    masses = np.array([p.mass for p in particles])
+    if len(particles) < BH_MIN_PARTICLES:
+        accelerations = direct_sum_accelerations(positions, masses, G_SIM, EPSILON)
+    else:
+        tree = build_quadtree(positions, masses)
+        accelerations = barnes_hut_accelerations(positions, masses, *tree, G_SIM, EPSILON, BH_THETA)
+    # Fixed bodies (like the Sun) don't move
+    for i, p in enumerate(particles):
+        if p.fixed:
+            accelerations[i] = 0.0
+    return accelerations
 
 
 def update_universe():
-    # Rebuild KDTree from current positions of all particles
+    dt = DT * time_speed  # DT scaled by time_speed
+    # Newly added or merged particles have no cached acceleration yet
+    if any(p.acceleration is None for p in particles):
+        positions = np.array([p.position for p in particles])
+        for p, acc in zip(particles, compute_accelerations(positions)):
+            p.acceleration = acc
+    # Velocity-Verlet: drift with the cached acceleration...
+    for p in particles:
+        if not p.fixed:
+            p.position += p.velocity * dt + 0.5 * p.acceleration * dt * dt
+    # ...then kick with the average of old and new accelerations
     positions = np.array([p.position for p in particles])
-    kdtree = KDTree(positions)
-    # For each particle (skip fixed ones), query nearest neighbors (k=4: itself + 3 neighbors)
-    for i, p in enumerate(particles):
+    for p, acc in zip(particles, compute_accelerations(positions)):
         if p.fixed:
             continue
-        neighbors_idx = kdtree.query(positions[i], k=4)[1]
-        # Exclude self if present
-        neighbor_list = [particles[j] for j in neighbors_idx if j != i]
-        if len(neighbor_list) == 0:
-            continue
-        neighbor_positions = np.array([n.position for n in neighbor_list])
-        neighbor_masses = np.array([n.mass for n in neighbor_list])
-        force = compute_force(p.position, neighbor_positions, neighbor_masses, G_SIM, EPSILON)
-        # Update velocity and position using simple Euler integration
-        p.velocity += force * DT * time_speed  # DT scaled by time_speed
-        p.position += p.velocity * DT * time_speed
+        p.velocity += 0.5 * (p.acceleration + acc) * dt
+        p.acceleration = acc
 
 
 # =============================================================================
@@ -175,7 +350,10 @@ def handle_collisions():
             p2 = particles[j]
             if p1.fixed or p2.fixed:
                 continue
-            if np.linalg.norm(p1.position - p2.position) < (p1.visual_radius + p2.visual_radius) * 0.5:
+            dx = p1.position[0] - p2.position[0]
+            dy = p1.position[1] - p2.position[1]
+            threshold = (p1.visual_radius + p2.visual_radius) * 0.5
+            if dx * dx + dy * dy < threshold * threshold:
                 new_mass = p1.mass + p2.mass
                 new_velocity = (p1.mass * p1.velocity + p2.mass * p2.velocity) / new_mass
                 new_color = tuple(min(255, int((p1.color[k] * p1.mass + p2.color[k] * p2.mass) / new_mass))
@@ -209,7 +387,9 @@ def create_particle_from_dict(planet):
         ], dtype=np.float64)
         sun = next((p for p in particles if p.name == "Sun"), None)
         if sun is not None:
-            r = np.linalg.norm(pos - sun.position)
+            dx = pos[0] - sun.position[0]
+            dy = pos[1] - sun.position[1]
+            r = math.sqrt(dx * dx + dy * dy)
             v_mag = math.sqrt(G_SIM * sun.mass / (r + EPSILON))
         else:
             v_mag = 0.3
@@ -237,10 +417,11 @@ def create_random_particle(position):
     pos = np.array(position, dtype=np.float64)
     sun = next((p for p in particles if p.name == "Sun"), None)
     if sun:
-        r_vec = pos - sun.position
-        r = np.linalg.norm(r_vec)
+        dx = pos[0] - sun.position[0]
+        dy = pos[1] - sun.position[1]
+        r = math.sqrt(dx * dx + dy * dy)
         if r > EPSILON:
-            angle = math.atan2(r_vec[1], r_vec[0])
+            angle = math.atan2(dy, dx)
             v_dir = np.array([-math.sin(angle), math.cos(angle)])
             v_mag = math.sqrt(G_SIM * sun.mass / (r + EPSILON))
             velocity = v_dir * v_mag
@@ -302,14 +483,14 @@ def main():
     time_of_day = 12.0  # Start at noon in solar mode
     paused = False
     running = True
+    cosmic_surface = pygame.Surface((WIDTH, HEIGHT))
+    frame = 0
+    overlay = None
+    overlay_key = None
 
     while running:
-        # Clear cosmic surface
-        cosmic_surface = pygame.Surface((WIDTH, HEIGHT))
-        cosmic_surface.fill(BLACK)
-        # Draw star field background on cosmic surface
-        for star in stars:
-            pygame.draw.circle(cosmic_surface, WHITE, star, 1)
+        # Clear cosmic surface with the pre-rendered star field background
+        cosmic_surface.blit(STARFIELD, (0, 0))
 
         if not paused:
             update_universe()
@@ -319,12 +500,11 @@ def main():
                 time_of_day = (time_of_day + 0.01 * time_speed * DT) % 24
 
         # Draw cosmic particles on cosmic surface
-        for p in particles:
-            p.draw(cosmic_surface)
-        for light in lights:
-            lx = int((light[0] - camera_x) * zoom + WIDTH / 2)
-            ly = int((light[1] - camera_y) * zoom + HEIGHT / 2)
-            pygame.draw.circle(cosmic_surface, (255, 255, 100), (lx, ly), 6)
+        particle_screen_xy = world_to_screen([p.position for p in particles]).tolist()
+        for p, screen_pos in zip(particles, particle_screen_xy):
+            p.draw(cosmic_surface, screen_pos)
+        for screen_pos in world_to_screen(lights).tolist():
+            pygame.draw.circle(cosmic_surface, (255, 255, 100), screen_pos, 6)
 
         # Mode switching: in "solar" mode, draw Earth environment and overlay cosmic sky
         if mode == "solar":
@@ -337,14 +517,17 @@ def main():
             # In "galaxy" mode, show full cosmic view
             screen.blit(cosmic_surface, (0, 0))
 
-        # Debug Overlay
-        total_mass = sum(p.mass for p in particles)
-        info_text = f"Time: {simulation_time:.1f}s | Mode: {mode} | Particles: {len(particles)} | DT: {DT:.3e} | Total Mass: {total_mass:.3e}"
-        info_text += f" | TimeSpeed: {time_speed:.2f}"
-        if mode == "solar":
-            info_text += f" | Hour: {time_of_day:.1f}"
-        overlay = font.render(info_text, True, WHITE)
+        # Debug Overlay (cached; refreshed periodically or when mode/particle count changes)
+        if overlay is None or frame % OVERLAY_REFRESH_FRAMES == 0 or overlay_key != (mode, len(particles)):
+            overlay_key = (mode, len(particles))
+            total_mass = sum(p.mass for p in particles)
+            info_text = f"Time: {simulation_time:.1f}s | Mode: {mode} | Particles: {len(particles)} | DT: {DT:.3e} | Total Mass: {total_mass:.3e}"
+            info_text += f" | TimeSpeed: {time_speed:.2f}"
+            if mode == "solar":
+                info_text += f" | Hour: {time_of_day:.1f}"
+            overlay = font.render(info_text, True, WHITE)
         screen.blit(overlay, (10, 10))
+        frame += 1
 
         pygame.display.flip()
         clock.tick(FPS)
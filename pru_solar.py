@@ -12,8 +12,8 @@ schwarzschild_limit = 2 * G / (c**2)  # Black hole collapse threshold
 
 # Simulation Parameters (Scaling for Long-Term Analysis)
 num_bodies = 10  # Simulating Sun + 9 planets
-time_steps = 50000  # Simulate for a longer period (around 137 years in Earth time)
-dt = 86400  # 1 day in seconds
+time_steps = 10000  # Simulate for a longer period (around 137 years in Earth time)
+dt = 5 * 86400  # 5 days in seconds (~18 velocity-Verlet steps per Mercury orbit)
 
 # Real-world Approximate Masses (kg) and Initial Distances (m)
 masses = np.array([
@@ -51,21 +51,20 @@ for i in range(1, num_bodies):  # Exclude the Sun (index 0)
 positions = initial_positions.copy()
 velocities = velocities.copy()
 
-# Energy & Trajectory Tracking
-total_kinetic_energy = []
-total_potential_energy = []
-total_energy = []
+# Energy & Trajectory Tracking (preallocated, filled by index each step)
+total_kinetic_energy = np.empty(time_steps)
+total_potential_energy = np.empty(time_steps)
+total_energy = np.empty(time_steps)
 trajectories = np.zeros((num_bodies, time_steps, 3))
 
 # Mercury-Specific Tracking for Orbital Precession
-mercury_orbit_perihelion = []  # Closest approach to Sun
-mercury_orbit_aphelion = []  # Farthest distance from Sun
-mercury_perihelion_shift = []  # Angle of closest approach over time
+mercury_distance = np.empty(time_steps)  # Distance from Sun (perihelion/aphelion taken after the run)
+mercury_perihelion_shift = np.empty(time_steps)  # Angle of closest approach over time
 
 def compute_forces(positions, masses):
     """Compute gravitational forces using vectorized calculations."""
-    pos_diff = positions[:, np.newaxis, :] - positions[np.newaxis, :, :]
-    distances = np.linalg.norm(pos_diff, axis=-1) + 1e-12  # Avoid division by zero
+    pos_diff = positions[np.newaxis, :, :] - positions[:, np.newaxis, :]  # r_j - r_i: gravity pulls i toward j
+    distances = np.sqrt(np.einsum('ijk,ijk->ij', pos_diff, pos_diff)) + 1e-12  # Avoid division by zero
 
     # Compute gravitational force magnitudes
     force_magnitude = G * masses[:, np.newaxis] * masses[np.newaxis, :] / distances**2
@@ -75,34 +74,37 @@ def compute_forces(positions, masses):
     force_vectors = force_magnitude[:, :, np.newaxis] * pos_diff / distances[:, :, np.newaxis]
     net_forces = np.sum(force_vectors, axis=1)
 
-    # Compute kinetic and potential energy
-    kinetic_energy = 0.5 * masses * np.sum(velocities**2, axis=1)
+    # Compute potential energy
     potential_energy = -0.5 * np.sum(force_magnitude * distances, axis=1)
 
-    return net_forces, np.sum(kinetic_energy), np.sum(potential_energy)
+    return net_forces, np.sum(potential_energy)
 
-# Running the Long-Term Simulation
+# Initial accelerations (cached across steps so forces are evaluated once per step)
+forces, potential_E = compute_forces(positions, masses)
+accelerations = forces / masses[:, np.newaxis]
+
+# Running the Long-Term Simulation (velocity-Verlet: kick-drift-kick)
 for t in range(time_steps):
-    forces, kinetic_E, potential_E = compute_forces(positions, masses)
-    
-    # Update velocities and positions
-    velocities += (forces / masses[:, np.newaxis]) * dt
-    positions += velocities * dt
+    positions += velocities * dt + 0.5 * accelerations * dt * dt
+    forces, potential_E = compute_forces(positions, masses)
+    new_accelerations = forces / masses[:, np.newaxis]
+    velocities += 0.5 * (accelerations + new_accelerations) * dt
+    accelerations = new_accelerations
+    kinetic_E = 0.5 * np.einsum('i,ij,ij->', masses, velocities, velocities, optimize='greedy')
 
     # Store energy and trajectories
-    total_kinetic_energy.append(kinetic_E)
-    total_potential_energy.append(potential_E)
-    total_energy.append(kinetic_E + potential_E)
+    total_kinetic_energy[t] = kinetic_E
+    total_potential_energy[t] = potential_E
+    total_energy[t] = kinetic_E + potential_E
     trajectories[:, t, :] = positions
 
-    # Track Mercury's orbit perihelion & aphelion over time
-    mercury_distance = np.linalg.norm(positions[1])  # Mercury's distance from Sun
-    mercury_orbit_perihelion.append(mercury_distance) if (len(mercury_orbit_perihelion) == 0 or mercury_distance < mercury_orbit_perihelion[-1]) else None
-    mercury_orbit_aphelion.append(mercury_distance) if (len(mercury_orbit_aphelion) == 0 or mercury_distance > mercury_orbit_aphelion[-1]) else None
+    # Track Mercury's distance from the Sun (perihelion & aphelion); the Sun itself drifts,
+    # so Mercury is measured relative to it rather than to the origin
+    mercury_offset = positions[1] - positions[0]
+    mercury_distance[t] = np.linalg.norm(mercury_offset)
 
     # Track precession (change in perihelion angle)
-    mercury_angle = np.arctan2(positions[1, 1], positions[1, 0])
-    mercury_perihelion_shift.append(mercury_angle)
+    mercury_perihelion_shift[t] = np.arctan2(mercury_offset[1], mercury_offset[0])
 
 # Cleanup memory
 gc.collect()
@@ -110,7 +112,7 @@ gc.collect()
 # Plotting Mercury's Precession Over Time
 plt.figure(figsize=(10, 5))
 plt.plot(range(time_steps), np.degrees(mercury_perihelion_shift), label="Mercury Perihelion Shift", color="purple")
-plt.xlabel("Time Step (Days)")
+plt.xlabel("Time Step (5 Days)")
 plt.ylabel("Perihelion Angle (Degrees)")
 plt.title("Mercury's Orbital Precession Over Time in PRU Simulation")
 plt.legend()
@@ -143,8 +145,8 @@ plt.show()
 
 # Mercury's Orbital Statistics
 mercury_stats = {
-    "Perihelion Distance (AU)": np.min(mercury_orbit_perihelion) / AU,
-    "Aphelion Distance (AU)": np.max(mercury_orbit_aphelion) / AU,
+    "Perihelion Distance (AU)": mercury_distance.min() / AU,
+    "Aphelion Distance (AU)": mercury_distance.max() / AU,
     "Total Perihelion Shift (Degrees)": np.degrees(mercury_perihelion_shift[-1] - mercury_perihelion_shift[0]),
 }
 
@@ -158,4 +160,4 @@ tools.display_dataframe_to_user(name="Mercury Orbital Analysis", dataframe=df_me
 # - The simulation successfully captures the **elliptical evolution of planetary orbits**.
 # - The total precession shift observed in PRU can now be **compared with General Relativity’s prediction** (about 43 arcseconds per century).
 
-print("🔍 Long-term Mercury orbit analysis complete! Do the results align with what you expected?")u
+print("🔍 Long-term Mercury orbit analysis complete! Do the results align with what you expected?")
@@ -28,26 +28,29 @@ velocities = np.array([
 
 N = len(masses)
 
-def compute_forces_vectorized(positions, velocities, masses):
-    sun_pos = positions[0]
-    r_vec = positions[1:] - sun_pos
-    r_mag = np.linalg.norm(r_vec, axis=1).reshape(-1, 1) + softening
-    accelerations = -G * masses[0] * r_vec / r_mag**3
+# Scratch buffers reused by every RHS call (solve_ivp evaluates it thousands of times)
+_r_vec = np.empty((N - 1, 3))
+_acc = np.zeros((N, 3))  # Sun row stays zero
+
+def compute_forces_vectorized(positions, masses, out):
+    """Write the accelerations into `out` without allocating intermediate arrays."""
+    r_vec = np.subtract(positions[1:], positions[0], out=_r_vec)
+    r_mag = np.sqrt(np.einsum('ij,ij->i', r_vec, r_vec))
+    scale = -G * masses[0] / (r_mag + softening)**3
 
     # Relativistic corrections for Mercury and Venus
-    for idx in [0, 1]:  # Mercury, Venus
-        r_mag_scalar = np.linalg.norm(r_vec[idx])
-        correction_factor = 1 + (3 * G * masses[0]) / (r_mag_scalar * c**2)
-        accelerations[idx] *= correction_factor
+    scale[:2] *= 1 + (3 * G * masses[0]) / (r_mag[:2] * c**2)
 
-    accelerations = np.vstack(([0, 0, 0], accelerations))
-    return accelerations
+    np.multiply(r_vec, scale[:, np.newaxis], out=out[1:])
+    return out
 
 def equations_of_motion(t, y):
-    positions = y[:3*N].reshape(N, 3)
-    velocities = y[3*N:].reshape(N, 3)
-    accelerations = compute_forces_vectorized(positions, velocities, masses)
-    dydt = np.concatenate([velocities.flatten(), accelerations.flatten()])
+    positions = y[:3*N].reshape(N, 3)  # View, no copy
+    compute_forces_vectorized(positions, masses, _acc)
+    # solve_ivp keeps references to returned derivatives, so the result itself must be a fresh array
+    dydt = np.empty_like(y)
+    dydt[:3*N] = y[3*N:]
+    dydt[3*N:] = _acc.ravel()
     return dydt
 
 # Initial state
@@ -61,7 +64,7 @@ solution = solve_ivp(
     t_eval=[T_total],
     rtol=1e-9,
     atol=1e-9,
-    method='RK45'
+    method='DOP853'
 )
 
 final_positions = solution.y[:3*N, -1].reshape(N, 3)
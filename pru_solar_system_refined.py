@@ -49,19 +49,29 @@ for i in range(len(planet_names)):
 time_steps = 1000
 dt = 1.0e6  # Time step in seconds
 
-# Store Planet Trajectories
-trajectories = np.zeros((len(planet_names), time_steps, 2))
+# Store Planet Trajectories (float32 is plenty for plotting; the integrator stays float64)
+trajectories = np.zeros((len(planet_names), time_steps, 2), dtype=np.float32)
 
-# PRU-Based Orbit Simulation (O(N) Scaling)
+def pru_accelerations(positions):
+    """Accelerations of all planets towards the (fixed) Sun under PRU gravity.
+
+    Only Sun -> planet attraction is modelled, so the planet mass cancels and
+    every planet is updated in one vectorized expression.
+    """
+    r2 = (positions * positions).sum(1)
+    inv_r3 = r2**-1.5
+    return -G_pru * M_sun * positions * inv_r3[:, None]
+
+# Initial accelerations (cached across steps so forces are evaluated once per step)
+accelerations = pru_accelerations(positions)
+
+# PRU-Based Orbit Simulation (O(N) Scaling, velocity-Verlet integration)
 for t in range(time_steps):
-    for i in range(len(planet_names)):
-        r = np.sqrt(positions[i, 0]**2 + positions[i, 1]**2)
-        F = (G_pru * M_sun * M_planets_pru[i]) / r**2
-        acc = F / M_planets_pru[i]
-        acc_vector = -acc * positions[i] / r
-        velocities[i] += acc_vector * dt
-        positions[i] += velocities[i] * dt
-        trajectories[i, t, :] = positions[i]
+    positions += velocities * dt + 0.5 * accelerations * dt * dt
+    new_accelerations = pru_accelerations(positions)
+    velocities += 0.5 * (accelerations + new_accelerations) * dt
+    accelerations = new_accelerations
+    trajectories[:, t, :] = positions
 
 # ===============================
 # Visualization of PRU Solar System
@@ -3,21 +3,32 @@ import sounddevice as sd
 import RPi.GPIO as GPIO
 import time
 import pickle
+import json
 import os
 from datetime import datetime
 
 # ============= PRU DATABASE HANDLER =============
 
 class PRUConstructor:
-    def __init__(self, save_path="pru_db.pkl"):
+    SNAPSHOT_EVERY = 1000  # Inserts between full pickle snapshots
+
+    def __init__(self, save_path="pru_db.pkl", journal_path="pru_db.jsonl"):
         self.save_path = save_path
+        self.journal_path = journal_path
         self.database = []
         self.relational_map = {}
+        self.pending = 0  # Entries in the journal but not yet in the snapshot
         self.load_database()
+        # Append-only journal: O(1) disk write per insert instead of re-pickling everything
+        self.journal = open(self.journal_path, "a", buffering=1)
 
     def save_database(self):
         with open(self.save_path, "wb") as f:
             pickle.dump((self.database, self.relational_map), f)
+        # Everything is in the snapshot now, so the journal can start over
+        self.journal.seek(0)
+        self.journal.truncate()
+        self.pending = 0
 
     def load_database(self):
         if os.path.exists(self.save_path):
@@ -25,13 +36,34 @@ class PRUConstructor:
                 self.database, self.relational_map = pickle.load(f)
         else:
             print("No existing PRU database found. Starting fresh.")
+        # Replay entries written since the last snapshot
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    if self._insert(json.loads(line)):
+                        self.pending += 1
+
+    def _insert(self, entry):
+        if entry in self.relational_map:
+            return False
+        index = len(self.database)
+        self.database.append(entry)
+        self.relational_map[entry] = index
+        return True
 
     def add_entry(self, entry):
-        if entry not in self.relational_map:
-            index = len(self.database)
-            self.database.append(entry)
-            self.relational_map[entry] = index
-            self.save_database()
+        """Adds a str entry; only strings survive the JSON journal round trip unchanged."""
+        if not isinstance(entry, str):
+            raise TypeError("PRU entries must be str, got %s" % type(entry).__name__)
+        if self._insert(entry):
+            self.journal.write(json.dumps(entry) + "\n")
+            self.pending += 1
+            if self.pending >= self.SNAPSHOT_EVERY:
+                self.save_database()
+
+    def close(self):
+        self.save_database()
+        self.journal.close()
 
 # ============= SENSOR CONFIGURATION =============
 
@@ -42,14 +74,21 @@ GPIO.setup(VIBRATION_PIN, GPIO.IN)
 
 # ============= SOUND PROCESSING =============
 
+# Recording buffer reused across calls (reallocated only if the duration/rate changes)
+_rec_buf = None
+
 def record_sound(duration=1, fs=44100):
-    recording = sd.rec(int(duration * fs), samplerate=fs, channels=1)
+    global _rec_buf
+    frames = int(duration * fs)
+    if _rec_buf is None or _rec_buf.shape[0] != frames:
+        _rec_buf = np.empty((frames, 1), dtype=np.float32)
+    sd.rec(samplerate=fs, out=_rec_buf)
     sd.wait()
-    data = recording[:, 0]
-    fft = np.fft.fft(data)
-    freq = np.fft.fftfreq(len(fft), 1 / fs)
-    idx = np.argmax(np.abs(fft))
-    dominant_freq = abs(freq[idx])
+    data = _rec_buf[:, 0]
+    # Real input: rfft keeps only the non-negative frequencies; compare squared magnitudes (no sqrt)
+    spectrum = np.fft.rfft(data)
+    idx = np.argmax(spectrum.real * spectrum.real + spectrum.imag * spectrum.imag)
+    dominant_freq = idx * fs / len(data)
     return round(dominant_freq, 2)
 
 # ============= MAIN LOGGER LOOP =============
@@ -83,6 +122,7 @@ def main():
     except KeyboardInterrupt:
         print("Logging stopped by user.")
     finally:
+        pru.close()
         GPIO.cleanup()
 
 if __name__ == "__main__":
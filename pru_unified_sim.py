@@ -1,7 +1,12 @@
 # Re-import necessary libraries after execution state reset
+import math
+import queue
+import threading
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # Headless: results go to pru_results.png
 import matplotlib.pyplot as plt
-from numba import njit, prange
+from numba import njit, prange, cuda, float32, float64, get_num_threads
 import pandas as pd
 import ace_tools_open as tools
 from scipy.spatial import cKDTree
@@ -20,6 +25,16 @@ G = 6.67430e-11             # Gravitational constant (m³/kg/s²)
 K_E = 8.9875517873681764e9   # Coulomb's constant (N·m²/C²)
 C_LIGHT = 3e8               # Speed of light (m/s)
 HEAT_TRANSFER_COEFF = 0.01  # Heat transfer rate
+NUM_ENTANGLEMENT_GROUPS = 10  # Entanglement ids are drawn from [0, NUM_ENTANGLEMENT_GROUPS)
+
+# Force Evaluation
+FORCE_METHOD = "tree"       # "tree" (KD-tree walk), "kdtree" (exact neighbor sum) or "cuda" (GPU all-pairs)
+FORCE_CUTOFF = 1e4          # Interaction cutoff radius (m)
+SOFTENING = 1e3             # Softening length (m)
+THETA = 0.5                 # Opening angle: cells with size/distance below this are treated as one body
+TREE_LEAF_SIZE = 16         # Maximum particles per KD-tree leaf
+TREE_WALK_CHUNK = 256       # Consecutive target particles per tree-walk task (one traversal stack each)
+CUDA_TILE = 128             # Threads per block = particles per shared-memory tile
 
 # Particle Types (Example: Electron, Proton, Neutron, Atom, Molecule, Star, Dark Matter)
 PARTICLE_TYPES = ["Electron", "Proton", "Neutron", "Atom", "Molecule", "Star", "Dark Matter"]
@@ -28,187 +43,533 @@ CHARGES = {"Electron": -1.6e-19, "Proton": 1.6e-19, "Neutron": 0.0, "Atom": 0.0,
 MASSES = {"Electron": 9.11e-31, "Proton": 1.67e-27, "Neutron": 1.67e-27, "Atom": 4.0e-26,
           "Molecule": 5.0e-26, "Star": 1.989e30, "Dark Matter": 1e-25}
 
-# Extend particle structure with quantum state and entanglement id.
-particle_dtype = np.dtype([
-    ('charge', np.float64),
-    ('mass', np.float64),
-    ('position', np.float64, (2,)),
-    ('velocity', np.float64, (2,)),
-    ('temperature', np.float64),
-    ('entropy', np.float64),
-    ('phase', np.int32),
-    ('quantum_state', np.float64),   # A simplified quantum state (e.g. probability amplitude)
-    ('entanglement_id', np.int32)    # An ID; particles sharing the same id are entangled
-])
-
-# Initialize Particle Types Separately (Fix for Numba)
-particle_types_list = np.random.choice(PARTICLE_TYPES, NUM_PARTICLES_COSMO)
-
-# Initialize Particles (Numba-Compatible Structured Array)
+# Particle state as flat per-field arrays (structure of arrays) so the kernels read
+# each field with unit stride. Quantum state and entanglement id are tracked too:
+# particles sharing the same entanglement_id are entangled.
+# Kinematic and thermal fields are float32 (ample precision at these scales, half the
+# bandwidth); mass and charge span ~50 orders of magnitude and stay float64.
+# Particle types are drawn as integer codes and mapped through per-type lookup tables,
+# so the whole population is built with vectorized NumPy calls instead of a Python loop.
 np.random.seed(42)
-particles_cosmo = np.zeros(NUM_PARTICLES_COSMO, dtype=particle_dtype)
+type_idx = np.random.randint(0, len(PARTICLE_TYPES), NUM_PARTICLES_COSMO)
+charge_table = np.array([CHARGES[t] for t in PARTICLE_TYPES])
+mass_table = np.array([MASSES[t] for t in PARTICLE_TYPES])
+
+charge = charge_table[type_idx]
+mass = mass_table[type_idx]
+positions = np.random.rand(NUM_PARTICLES_COSMO, 2) * 1e6 - 5e5          # Positions over a large cosmic scale
+velocities = np.random.randn(NUM_PARTICLES_COSMO, 2) * 1e4              # Initial velocities
+pos_x = positions[:, 0].astype(np.float32)
+pos_y = positions[:, 1].astype(np.float32)
+vel_x = velocities[:, 0].astype(np.float32)
+vel_y = velocities[:, 1].astype(np.float32)
 
 # Instead of a fixed temperature, initialize with a range.
-# Also, assign each particle a random quantum state in [0, 1] and a random entanglement_id (say 0 to 9 for 10 groups)
-for i in range(NUM_PARTICLES_COSMO):
-    p_type = particle_types_list[i]
-    particles_cosmo[i] = (
-        CHARGES[p_type],
-        MASSES[p_type],
-        np.random.rand(2) * 1e6 - 5e5,      # Positions over a large cosmic scale
-        np.random.randn(2) * 1e4,             # Initial velocities
-        np.random.uniform(100, 5000),         # Temperature (K)
-        0.0,                                  # Initial entropy
-        0,                                    # Initial phase (to be updated)
-        np.random.rand(),                     # Quantum state (a simplified value in [0,1])
-        np.random.randint(0, 10)              # Entanglement ID: particles with same id update together
-    )
+# Also, assign each particle a random quantum state in [0, 1] and a random entanglement_id (one of NUM_ENTANGLEMENT_GROUPS groups)
+temperature = np.random.uniform(100, 5000, NUM_PARTICLES_COSMO).astype(np.float32)   # Temperature (K)
+entropy = np.zeros(NUM_PARTICLES_COSMO, dtype=np.float32)
+phase = np.zeros(NUM_PARTICLES_COSMO, dtype=np.int32)
+quantum_state = np.random.rand(NUM_PARTICLES_COSMO).astype(np.float32)   # A simplified quantum state (e.g. probability amplitude)
+entanglement_id = np.random.randint(0, NUM_ENTANGLEMENT_GROUPS, NUM_PARTICLES_COSMO).astype(np.int32)  # Particles with same id update together
 
 # ===============================
 # Optimized Force, Heat Transfer, and Phase Update Models
 # ===============================
 
-def compute_forces_kdtree(particles):
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False, nogil=True)
+def forces_from_pairs(pairs, pos_x, pos_y, vel_x, vel_y, mass, charge, local_fx, local_fy):
+    """
+    Sums the pair forces over a list of unique pairs (i < j), evaluating each pair once
+    and writing it back to both particles (Newton's third law). The gamma factor belongs
+    to the receiving particle, so it is applied separately on each side.
+    Each worker accumulates into its own row of the (n_threads, N) buffers local_fx/local_fy;
+    the rows are summed at the end and zeroed in the same pass, so the caller can reuse them
+    across steps. They cost 16 * n_threads * N bytes (e.g. ~100 MB for 64 threads, N = 100k).
+    """
+    num_p = pos_x.shape[0]
+    num_pairs = pairs.shape[0]
+    n_threads = local_fx.shape[0]
+    soft2 = np.float32(SOFTENING * SOFTENING)
+
+    gamma = np.empty(num_p)
+    for i in prange(num_p):
+        # Clamp v/c at 0.999 with min() rather than branching between two gamma formulas
+        v_rel = min(math.sqrt(vel_x[i] * vel_x[i] + vel_y[i] * vel_y[i]) / C_LIGHT, 0.999)
+        gamma[i] = 1.0 / math.sqrt(1.0 - v_rel * v_rel)
+
+    chunk = (num_pairs + n_threads - 1) // n_threads
+    for t in prange(n_threads):
+        for p in range(t * chunk, min((t + 1) * chunk, num_pairs)):
+            i = pairs[p, 0]
+            j = pairs[p, 1]
+            dx = pos_x[j] - pos_x[i]
+            dy = pos_y[j] - pos_y[i]
+            d2 = dx * dx + dy * dy + soft2
+            inv_r = 1.0 / math.sqrt(d2)
+            f = (G * mass[i] * mass[j] + K_E * charge[i] * charge[j]) * inv_r * inv_r * inv_r
+            f_i = f * gamma[i]
+            f_j = f * gamma[j]
+            local_fx[t, i] += f_i * dx
+            local_fy[t, i] += f_i * dy
+            local_fx[t, j] -= f_j * dx
+            local_fy[t, j] -= f_j * dy
+
+    fx = np.empty(num_p)
+    fy = np.empty(num_p)
+    for i in prange(num_p):
+        fxi = 0.0
+        fyi = 0.0
+        for t in range(n_threads):
+            fxi += local_fx[t, i]
+            fyi += local_fy[t, i]
+            local_fx[t, i] = 0.0
+            local_fy[t, i] = 0.0
+        fx[i] = fxi
+        fy[i] = fyi
+    return fx, fy
+
+# Per-thread force rows for forces_from_pairs, allocated once and reused across steps
+_pair_force_rows = {}
+
+def compute_forces_kdtree(pos_x, pos_y, vel_x, vel_y, mass, charge):
     """
     Computes gravitational, electromagnetic, and relativistic forces
     using a KDTree to limit interactions.
-    Only neighbors within a cutoff radius are considered.
+    Only neighbors within a cutoff radius are considered: all interacting pairs come
+    from one batched query, and the force sums run in a Numba kernel.
+    """
+    tree = cKDTree(np.column_stack((pos_x, pos_y)))
+    pairs = tree.query_pairs(FORCE_CUTOFF, output_type='ndarray')
+    shape = (get_num_threads(), pos_x.shape[0])
+    if _pair_force_rows.get("shape") != shape:
+        _pair_force_rows.update(shape=shape, fx=np.zeros(shape), fy=np.zeros(shape))
+    return forces_from_pairs(pairs, pos_x, pos_y, vel_x, vel_y, mass, charge,
+                             _pair_force_rows["fx"], _pair_force_rows["fy"])
+
+@njit(fastmath=True, cache=True, boundscheck=False, nogil=True)
+def build_kdtree(pos_x, pos_y, mass, charge, leaf_size):
     """
-    num_p = len(particles)
-    forces = np.zeros((num_p, 2))
-    positions = particles['position']
-    tree = cKDTree(positions)
-    cutoff = 1e4  # Cutoff radius for neighbor search
-
-    for i in range(num_p):
-        pos_i = positions[i]
-        neighbors = tree.query_ball_point(pos_i, cutoff)
-        if i in neighbors:
-            neighbors.remove(i)
-        for j in neighbors:
-            r_vec = positions[j] - pos_i
-            distance = np.sqrt(r_vec[0]**2 + r_vec[1]**2 + 1e3**2)
-            F_g = (G * particles[i]['mass'] * particles[j]['mass']) / (distance**2)
-            F_e = (K_E * particles[i]['charge'] * particles[j]['charge']) / (distance**2)
-            v_norm = np.sqrt(particles[i]['velocity'][0]**2 + particles[i]['velocity'][1]**2)
-            v_rel = v_norm / C_LIGHT
-            gamma = 1.0 / np.sqrt(1 - 0.999**2) if v_rel >= 0.999 else 1.0 / np.sqrt(1 - v_rel**2)
-            force_magnitude = (F_g + F_e) * gamma
-            forces[i, 0] += force_magnitude * (r_vec[0] / distance)
-            forces[i, 1] += force_magnitude * (r_vec[1] / distance)
-    return forces
-
-@njit(parallel=True)
-def compute_heat_transfer(particles):
+    Builds a flat KD-tree (median splits along the widest axis).
+    Each node stores its particle range in `perm`, bounding box, total mass and charge,
+    center of mass, and center of (absolute) charge.
+    """
+    n = pos_x.shape[0]
+    max_nodes = 4 * (n // leaf_size + 1)
+    perm = np.arange(n)
+    left = -np.ones(max_nodes, dtype=np.int64)
+    right = -np.ones(max_nodes, dtype=np.int64)
+    start = np.zeros(max_nodes, dtype=np.int64)
+    end = np.zeros(max_nodes, dtype=np.int64)
+    bbox_min = np.zeros((max_nodes, 2))
+    bbox_max = np.zeros((max_nodes, 2))
+    com = np.zeros((max_nodes, 2))
+    coc = np.zeros((max_nodes, 2))
+    total_mass = np.zeros(max_nodes)
+    total_charge = np.zeros(max_nodes)
+
+    end[0] = n
+    count = 1
+    node = 0
+    while node < count:
+        s = start[node]
+        e = end[node]
+        xmin = ymin = np.inf
+        xmax = ymax = -np.inf
+        m_sum = mx = my = 0.0
+        q_sum = qa_sum = qx = qy = 0.0
+        for k in range(s, e):
+            j = perm[k]
+            x = pos_x[j]
+            y = pos_y[j]
+            xmin = min(xmin, x)
+            xmax = max(xmax, x)
+            ymin = min(ymin, y)
+            ymax = max(ymax, y)
+            m_sum += mass[j]
+            mx += mass[j] * x
+            my += mass[j] * y
+            q_abs = abs(charge[j])
+            q_sum += charge[j]
+            qa_sum += q_abs
+            qx += q_abs * x
+            qy += q_abs * y
+        bbox_min[node, 0] = xmin
+        bbox_min[node, 1] = ymin
+        bbox_max[node, 0] = xmax
+        bbox_max[node, 1] = ymax
+        total_mass[node] = m_sum
+        total_charge[node] = q_sum
+        if m_sum > 0:
+            com[node, 0] = mx / m_sum
+            com[node, 1] = my / m_sum
+        if qa_sum > 0:
+            coc[node, 0] = qx / qa_sum
+            coc[node, 1] = qy / qa_sum
+
+        if e - s > leaf_size:
+            axis = pos_x if (xmax - xmin) >= (ymax - ymin) else pos_y
+            keys = np.empty(e - s)
+            for k in range(s, e):
+                keys[k - s] = axis[perm[k]]
+            perm[s:e] = perm[s:e][np.argsort(keys)]
+            mid = s + (e - s) // 2
+            left[node] = count
+            start[count] = s
+            end[count] = mid
+            right[node] = count + 1
+            start[count + 1] = mid
+            end[count + 1] = e
+            count += 2
+        node += 1
+
+    return (perm, left[:count], right[:count], start[:count], end[:count], bbox_min[:count],
+            bbox_max[:count], com[:count], coc[:count], total_mass[:count], total_charge[:count])
+
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False, nogil=True)
+def tree_walk_forces(pos_x, pos_y, vel_x, vel_y, mass, charge, perm, left, right, start, end,
+                     bbox_min, bbox_max, com, coc, total_mass, total_charge):
+    """
+    Gravitational, electromagnetic, and relativistic forces from a KD-tree walk.
+    Nodes entirely beyond FORCE_CUTOFF (MinDist) are pruned; nodes entirely inside it (MaxDist)
+    that are small relative to their distance are replaced by their total mass/charge.
+    Sources are gathered into tree order so every leaf is a contiguous window, and targets
+    are visited in the same order so each thread's consecutive particles reuse the same
+    leaves while they are still in cache. Targets are processed in chunks of TREE_WALK_CHUNK
+    that share one traversal stack, so the stack is not reallocated per particle.
+    """
+    num_p = pos_x.shape[0]
+    fx = np.zeros(num_p)
+    fy = np.zeros(num_p)
+    cutoff2 = FORCE_CUTOFF * FORCE_CUTOFF
+    soft2 = np.float32(SOFTENING * SOFTENING)
+    sx = pos_x[perm]
+    sy = pos_y[perm]
+    sm = mass[perm]
+    sc = charge[perm]
+    n_chunks = (num_p + TREE_WALK_CHUNK - 1) // TREE_WALK_CHUNK
+    for c in prange(n_chunks):
+        stack = np.empty(128, dtype=np.int64)
+        for ii in range(c * TREE_WALK_CHUNK, min((c + 1) * TREE_WALK_CHUNK, num_p)):
+            i = perm[ii]
+            pxi = sx[ii]
+            pyi = sy[ii]
+            # Clamp v/c at 0.999 with min() rather than branching between two gamma formulas
+            v_rel = min(math.sqrt(vel_x[i] * vel_x[i] + vel_y[i] * vel_y[i]) / C_LIGHT, 0.999)
+            gamma = 1.0 / math.sqrt(1.0 - v_rel * v_rel)
+            # Per-particle invariants, computed once instead of once per neighbour
+            gm_i = G * mass[i] * gamma
+            kq_i = K_E * charge[i] * gamma
+            # float32 geometry, float64 accumulators
+            fxi = 0.0
+            fyi = 0.0
+            stack[0] = 0
+            top = 1
+            while top > 0:
+                top -= 1
+                node = stack[top]
+                # MinDist / MaxDist from particle i to the node's bounding box
+                gx = max(bbox_min[node, 0] - pxi, 0.0, pxi - bbox_max[node, 0])
+                gy = max(bbox_min[node, 1] - pyi, 0.0, pyi - bbox_max[node, 1])
+                if gx * gx + gy * gy > cutoff2:
+                    continue
+                if left[node] < 0:
+                    for k in range(start[node], end[node]):
+                        if k == ii:
+                            continue
+                        dx = sx[k] - pxi
+                        dy = sy[k] - pyi
+                        r2 = dx * dx + dy * dy
+                        if r2 > cutoff2:
+                            continue
+                        d2 = r2 + soft2
+                        inv_r = 1.0 / math.sqrt(d2)
+                        f = (gm_i * sm[k] + kq_i * sc[k]) * inv_r * inv_r * inv_r
+                        fxi += f * dx
+                        fyi += f * dy
+                    continue
+                hx = max(pxi - bbox_min[node, 0], bbox_max[node, 0] - pxi)
+                hy = max(pyi - bbox_min[node, 1], bbox_max[node, 1] - pyi)
+                size = max(bbox_max[node, 0] - bbox_min[node, 0], bbox_max[node, 1] - bbox_min[node, 1])
+                dx = com[node, 0] - pxi
+                dy = com[node, 1] - pyi
+                r2 = dx * dx + dy * dy
+                if hx * hx + hy * hy <= cutoff2 and size * size < THETA * THETA * r2:
+                    # Monopole: gravity from the center of mass, Coulomb from the center of charge
+                    d2 = r2 + soft2
+                    inv_r = 1.0 / math.sqrt(d2)
+                    f = gm_i * total_mass[node] * inv_r * inv_r * inv_r
+                    fxi += f * dx
+                    fyi += f * dy
+                    if total_charge[node] != 0.0:
+                        dx = coc[node, 0] - pxi
+                        dy = coc[node, 1] - pyi
+                        d2 = dx * dx + dy * dy + soft2
+                        inv_r = 1.0 / math.sqrt(d2)
+                        f = kq_i * total_charge[node] * inv_r * inv_r * inv_r
+                        fxi += f * dx
+                        fyi += f * dy
+                else:
+                    stack[top] = left[node]
+                    stack[top + 1] = right[node]
+                    top += 2
+            fx[i] = fxi
+            fy[i] = fyi
+    return fx, fy
+
+def compute_forces(pos_x, pos_y, vel_x, vel_y, mass, charge):
+    """
+    Computes gravitational, electromagnetic, and relativistic forces in O(N log N)
+    by walking a KD-tree rebuilt once per step.
+    """
+    tree = build_kdtree(pos_x, pos_y, mass, charge, TREE_LEAF_SIZE)
+    return tree_walk_forces(pos_x, pos_y, vel_x, vel_y, mass, charge, *tree)
+
+@cuda.jit
+def force_kernel(pos_x, pos_y, vel_x, vel_y, mass, charge, fx, fy):
+    """
+    All-pairs force kernel (same cutoff model as compute_forces_kdtree), one thread per particle.
+    Each block stages CUDA_TILE source particles in shared memory, then every thread sums over the tile.
+    """
+    sx = cuda.shared.array(CUDA_TILE, float32)
+    sy = cuda.shared.array(CUDA_TILE, float32)
+    sm = cuda.shared.array(CUDA_TILE, float64)
+    sc = cuda.shared.array(CUDA_TILE, float64)
+    num_p = pos_x.shape[0]
+    i = cuda.grid(1)
+    tx = cuda.threadIdx.x
+    cutoff2 = FORCE_CUTOFF * FORCE_CUTOFF
+    soft2 = float32(SOFTENING * SOFTENING)
+
+    pxi = pyi = float32(0.0)
+    gm_i = kq_i = 0.0
+    if i < num_p:
+        pxi = pos_x[i]
+        pyi = pos_y[i]
+        # Clamp v/c at 0.999 with min() rather than branching between two gamma formulas
+        v_rel = min(math.sqrt(vel_x[i] * vel_x[i] + vel_y[i] * vel_y[i]) / C_LIGHT, 0.999)
+        gamma = 1.0 / math.sqrt(1.0 - v_rel * v_rel)
+        # Per-particle invariants, computed once instead of once per tile entry
+        gm_i = G * mass[i] * gamma
+        kq_i = K_E * charge[i] * gamma
+    fxi = 0.0
+    fyi = 0.0
+
+    for tile_start in range(0, num_p, CUDA_TILE):
+        j = tile_start + tx
+        if j < num_p:
+            sx[tx] = pos_x[j]
+            sy[tx] = pos_y[j]
+            sm[tx] = mass[j]
+            sc[tx] = charge[j]
+        cuda.syncthreads()
+        if i < num_p:
+            for k in range(min(CUDA_TILE, num_p - tile_start)):
+                if tile_start + k == i:
+                    continue
+                dx = sx[k] - pxi
+                dy = sy[k] - pyi
+                r2 = dx * dx + dy * dy
+                if r2 > cutoff2:
+                    continue
+                d2 = r2 + soft2
+                distance = math.sqrt(d2)
+                f = (gm_i * sm[k] + kq_i * sc[k]) / d2
+                fxi += f * dx / distance
+                fyi += f * dy / distance
+        cuda.syncthreads()
+
+    if i < num_p:
+        fx[i] = fxi
+        fy[i] = fyi
+
+# Device buffers, allocated on the first call and reused every step
+_cuda_buffers = {}
+
+def compute_forces_cuda(pos_x, pos_y, vel_x, vel_y, mass, charge):
+    """
+    Computes forces on the GPU. Mass and charge never change, so they are uploaded once;
+    only positions and velocities go to the device and forces come back each step.
+    """
+    num_p = len(pos_x)
+    d = _cuda_buffers
+    if not d:
+        d['mass'] = cuda.to_device(mass)
+        d['charge'] = cuda.to_device(charge)
+        for name in ('pos_x', 'pos_y', 'vel_x', 'vel_y'):
+            d[name] = cuda.device_array(num_p, dtype=np.float32)
+        for name in ('fx', 'fy'):
+            d[name] = cuda.device_array(num_p)
+    d['pos_x'].copy_to_device(pos_x)
+    d['pos_y'].copy_to_device(pos_y)
+    d['vel_x'].copy_to_device(vel_x)
+    d['vel_y'].copy_to_device(vel_y)
+    blocks = (num_p + CUDA_TILE - 1) // CUDA_TILE
+    force_kernel[blocks, CUDA_TILE](d['pos_x'], d['pos_y'], d['vel_x'], d['vel_y'],
+                                    d['mass'], d['charge'], d['fx'], d['fy'])
+    return d['fx'].copy_to_host(), d['fy'].copy_to_host()
+
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False, nogil=True)
+def compute_heat_transfer(temperature, entropy, new_temps, new_entropy, phase):
     """
     Computes heat transfer and entropy changes using PRU relational updates.
     Normalizes the update to spread equilibration.
+    Every particle exchanges heat with every other one, and Q_ij = k * (T_j - T_i) is linear,
+    so the sum over j collapses to Q_i = k * N * (T_mean - T_i): O(N) instead of O(N²).
+    Results are written into the caller's new_temps / new_entropy buffers.
+    The phase state is classified from the new temperature in the same pass:
+      - 0: Solid (<500 K)
+      - 1: Liquid (500 K ≤ T < 2500 K)
+      - 2: Gas (≥2500 K)
     """
-    num_p = len(particles)
-    new_temps = particles['temperature'].copy()
-    new_entropy = particles['entropy'].copy()
+    num_p = len(temperature)
     norm_factor = 1000.0
+    # k * N * dt / norm folded into one coefficient: dT_i = heat_scale * (T_mean - T_i)
+    heat_scale = HEAT_TRANSFER_COEFF * num_p * DELTA_T / norm_factor
+    T_sum = 0.0  # float64 accumulator over the float32 temperatures
+    for i in prange(num_p):
+        T_sum += temperature[i]
+    T_mean = T_sum / num_p
 
     for i in prange(num_p):
-        for j in range(num_p):
-            if i != j:
-                Q_ij = HEAT_TRANSFER_COEFF * (particles[j]['temperature'] - particles[i]['temperature'])
-                new_temps[i] += (Q_ij * DELTA_T) / norm_factor
-                if new_temps[i] > 0:
-                    new_entropy[i] += ((Q_ij / new_temps[i]) * DELTA_T) / norm_factor
-    return new_temps, new_entropy
-
-@njit(parallel=True)
-def update_positions(particles, forces):
+        dT = heat_scale * (T_mean - temperature[i])
+        T_new = temperature[i] + dT
+        new_temps[i] = T_new
+        new_entropy[i] = entropy[i] + (dT / T_new if T_new > 0 else 0.0)
+        # Branchless threshold ladder on the stored value: count the thresholds reached
+        temp = new_temps[i]
+        phase[i] = (temp >= 500) + (temp >= 2500)
+
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False, nogil=True)
+def update_positions(pos_x, pos_y, vel_x, vel_y, mass, fx, fy):
     """
     Updates positions and velocities using the PRU relational framework.
     Caps velocities at 0.99 times the speed of light.
     """
-    for i in prange(len(particles)):
-        particles[i]['velocity'][0] += forces[i, 0] * DELTA_T / particles[i]['mass']
-        particles[i]['velocity'][1] += forces[i, 1] * DELTA_T / particles[i]['mass']
-        v_norm = np.sqrt(particles[i]['velocity'][0]**2 + particles[i]['velocity'][1]**2)
-        if v_norm > 0.99 * C_LIGHT:
-            scale = (0.99 * C_LIGHT) / v_norm
-            particles[i]['velocity'][0] *= scale
-            particles[i]['velocity'][1] *= scale
-        particles[i]['position'][0] += particles[i]['velocity'][0] * DELTA_T
-        particles[i]['position'][1] += particles[i]['velocity'][1] * DELTA_T
-
-@njit(parallel=True)
-def update_phases(particles):
-    """
-    Updates phase state based on temperature thresholds:
-      - 0: Solid (<500 K)
-      - 1: Liquid (500 K ≤ T < 2500 K)
-      - 2: Gas (≥2500 K)
-    """
-    for i in prange(len(particles)):
-        temp = particles[i]['temperature']
-        if temp < 500:
-            particles[i]['phase'] = 0
-        elif temp < 2500:
-            particles[i]['phase'] = 1
-        else:
-            particles[i]['phase'] = 2
-
-def update_quantum_states(particles):
+    v_max = 0.99 * C_LIGHT
+    for i in prange(len(pos_x)):
+        dt_over_m = DELTA_T / mass[i]
+        vel_x[i] += fx[i] * dt_over_m
+        vel_y[i] += fy[i] * dt_over_m
+        # Compare squared speeds; the sqrt is only needed when the cap applies
+        v2 = vel_x[i] * vel_x[i] + vel_y[i] * vel_y[i]
+        if v2 > v_max * v_max:
+            scale = v_max / math.sqrt(v2)
+            vel_x[i] *= scale
+            vel_y[i] *= scale
+        pos_x[i] += vel_x[i] * DELTA_T
+        pos_y[i] += vel_y[i] * DELTA_T
+
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False, nogil=True)
+def update_quantum_states(quantum_state, entanglement_id):
     """
     Relational update for quantum states.
     Particles sharing the same entanglement_id update their quantum state to the group average.
     """
-    unique_ids = np.unique(particles['entanglement_id'])
-    for eid in unique_ids:
-        indices = np.where(particles['entanglement_id'] == eid)[0]
-        avg_state = particles['quantum_state'][indices].mean()
-        particles['quantum_state'][indices] = avg_state
+    # One grouped pass into a fixed-size group table, then scatter the averages back
+    sums = np.zeros(NUM_ENTANGLEMENT_GROUPS)
+    counts = np.zeros(NUM_ENTANGLEMENT_GROUPS)
+    for i in range(quantum_state.shape[0]):
+        g = entanglement_id[i]
+        sums[g] += quantum_state[i]
+        counts[g] += 1.0
+    for g in range(NUM_ENTANGLEMENT_GROUPS):
+        if counts[g] > 0:
+            sums[g] /= counts[g]
+    for i in prange(quantum_state.shape[0]):
+        quantum_state[i] = sums[entanglement_id[i]]
+
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False, nogil=True)
+def reduce_stats(temperature, entropy, phase, quantum_state, vel_x, vel_y):
+    """
+    Per-step telemetry in one fused pass: mean/min/max temperature and the mean
+    entropy, phase, quantum state and speed, without temporary arrays.
+    """
+    num_p = temperature.shape[0]
+    sum_T = 0.0
+    min_T = np.inf
+    max_T = -np.inf
+    sum_S = 0.0
+    sum_phase = 0.0
+    sum_q = 0.0
+    sum_v = 0.0
+    for i in prange(num_p):
+        t = temperature[i]
+        sum_T += t
+        min_T = min(min_T, t)
+        max_T = max(max_T, t)
+        sum_S += entropy[i]
+        sum_phase += phase[i]
+        sum_q += quantum_state[i]
+        sum_v += math.sqrt(vel_x[i] * vel_x[i] + vel_y[i] * vel_y[i])
+    return (sum_T / num_p, min_T, max_T, sum_S / num_p,
+            sum_phase / num_p, sum_q / num_p, sum_v / num_p)
 
 # ===============================
 # Simulation Loop (Unified Classical & Quantum Relational Updates)
 # ===============================
 
-temperature_history_cosmo = []
-entropy_history_cosmo = []
-phase_history_cosmo = []
-velocity_history_cosmo = []
-quantum_state_history = []  # Track average quantum state
-min_temperature_history = []
-max_temperature_history = []
+# Per-step history, preallocated and filled by index
+temperature_history_cosmo = np.empty(TIME_STEPS)
+entropy_history_cosmo = np.empty(TIME_STEPS)
+phase_history_cosmo = np.empty(TIME_STEPS)
+velocity_history_cosmo = np.empty(TIME_STEPS)
+quantum_state_history = np.empty(TIME_STEPS)  # Track average quantum state
+min_temperature_history = np.empty(TIME_STEPS)
+max_temperature_history = np.empty(TIME_STEPS)
+
+# Heat-transfer output buffers, swapped with the live arrays every step (ping-pong)
+temperature_buf = np.empty_like(temperature)
+entropy_buf = np.empty_like(entropy)
+
+def log_worker(log_queue):
+    """
+    Drains (step, stats) tuples from the simulation loop, records them in the history
+    arrays and prints progress, so stdout I/O overlaps with the (GIL-free) kernels.
+    A None item ends the worker.
+    """
+    while True:
+        item = log_queue.get()
+        if item is None:
+            break
+        step, (avg_temp, min_temp, max_temp, avg_entropy, avg_phase, avg_quantum, avg_velocity) = item
+        temperature_history_cosmo[step] = avg_temp
+        entropy_history_cosmo[step] = avg_entropy
+        phase_history_cosmo[step] = avg_phase
+        velocity_history_cosmo[step] = avg_velocity
+        quantum_state_history[step] = avg_quantum
+        min_temperature_history[step] = min_temp
+        max_temperature_history[step] = max_temp
+
+        if step % 10 == 0:
+            print(f"Step {step}/{TIME_STEPS} - Avg Temp: {avg_temp:.2f} K, Min Temp: {min_temp:.2f} K, Max Temp: {max_temp:.2f} K, "
+                  f"Avg Entropy: {avg_entropy:.6f} J/K, Avg Velocity: {avg_velocity:.2f} m/s, Avg Phase: {avg_phase:.2f}, "
+                  f"Avg Quantum State: {avg_quantum:.4f}")
+
+log_queue = queue.Queue()
+log_thread = threading.Thread(target=log_worker, args=(log_queue,), daemon=True)
+log_thread.start()
 
 for step in range(TIME_STEPS):
-    forces_cosmo = compute_forces_kdtree(particles_cosmo)
-    temperatures_cosmo, entropy_cosmo = compute_heat_transfer(particles_cosmo)
-    
-    particles_cosmo['temperature'] = temperatures_cosmo
-    particles_cosmo['entropy'] = entropy_cosmo
+    if FORCE_METHOD == "tree":
+        fx, fy = compute_forces(pos_x, pos_y, vel_x, vel_y, mass, charge)
+    elif FORCE_METHOD == "cuda":
+        fx, fy = compute_forces_cuda(pos_x, pos_y, vel_x, vel_y, mass, charge)
+    else:
+        fx, fy = compute_forces_kdtree(pos_x, pos_y, vel_x, vel_y, mass, charge)
+    compute_heat_transfer(temperature, entropy, temperature_buf, entropy_buf, phase)
+    temperature, temperature_buf = temperature_buf, temperature
+    entropy, entropy_buf = entropy_buf, entropy
 
-    update_positions(particles_cosmo, forces_cosmo)
-    update_phases(particles_cosmo)
+    update_positions(pos_x, pos_y, vel_x, vel_y, mass, fx, fy)
     
     # Unified quantum relational update (all entangled particles update their quantum state)
-    update_quantum_states(particles_cosmo)
+    update_quantum_states(quantum_state, entanglement_id)
 
-    avg_temp = particles_cosmo['temperature'].mean()
-    avg_entropy = particles_cosmo['entropy'].mean()
-    avg_velocity = np.mean(np.sqrt(particles_cosmo['velocity'][:,0]**2 + particles_cosmo['velocity'][:,1]**2))
-    avg_phase = particles_cosmo['phase'].mean()
-    avg_quantum = particles_cosmo['quantum_state'].mean()
-    
-    min_temp = np.min(particles_cosmo['temperature'])
-    max_temp = np.max(particles_cosmo['temperature'])
-    
-    temperature_history_cosmo.append(avg_temp)
-    entropy_history_cosmo.append(avg_entropy)
-    phase_history_cosmo.append(avg_phase)
-    velocity_history_cosmo.append(avg_velocity)
-    quantum_state_history.append(avg_quantum)
-    min_temperature_history.append(min_temp)
-    max_temperature_history.append(max_temp)
-    
-    if step % 10 == 0:
-        print(f"Step {step}/{TIME_STEPS} - Avg Temp: {avg_temp:.2f} K, Min Temp: {min_temp:.2f} K, Max Temp: {max_temp:.2f} K, "
-              f"Avg Entropy: {avg_entropy:.6f} J/K, Avg Velocity: {avg_velocity:.2f} m/s, Avg Phase: {avg_phase:.2f}, "
-              f"Avg Quantum State: {avg_quantum:.4f}")
+    # Hand the scalars to the logging thread; the loop never blocks on stdout
+    log_queue.put((step, reduce_stats(temperature, entropy, phase, quantum_state, vel_x, vel_y)))
+
+log_queue.put(None)
+log_thread.join()
 
 # ===============================
 # Analysis & Visualization
@@ -228,45 +589,48 @@ simulation_results_cosmo_df = pd.DataFrame({
 tools.display_dataframe_to_user(name="Unified PRU Cosmological Model Results (Debugging Info)",
                                 dataframe=simulation_results_cosmo_df)
 
-plt.figure(figsize=(10, 5))
-plt.plot(range(TIME_STEPS), temperature_history_cosmo, label="Avg Temperature", color="red")
-plt.plot(range(TIME_STEPS), min_temperature_history, label="Min Temperature", color="blue", linestyle="--")
-plt.plot(range(TIME_STEPS), max_temperature_history, label="Max Temperature", color="green", linestyle="--")
-plt.xlabel("Time Steps")
-plt.ylabel("Temperature (K)")
-plt.title("Unified PRU Cosmological Model: Temperature Evolution")
-plt.legend()
-plt.show()
-
-plt.figure(figsize=(10, 5))
-plt.plot(range(TIME_STEPS), entropy_history_cosmo, label="Avg Entropy", color="orange")
-plt.xlabel("Time Steps")
-plt.ylabel("Entropy (J/K)")
-plt.title("Unified PRU Cosmological Model: Entropy Evolution")
-plt.legend()
-plt.show()
-
-plt.figure(figsize=(10, 5))
-plt.plot(range(TIME_STEPS), phase_history_cosmo, label="Avg Phase (0=Solid,1=Liquid,2=Gas)", color="purple")
-plt.xlabel("Time Steps")
-plt.ylabel("Phase State")
-plt.title("Unified PRU Cosmological Model: Phase Transitions")
-plt.legend()
-plt.show()
-
-plt.figure(figsize=(10, 5))
-plt.plot(range(TIME_STEPS), velocity_history_cosmo, label="Avg Velocity", color="blue")
-plt.xlabel("Time Steps")
-plt.ylabel("Velocity (m/s)")
-plt.title("Unified PRU Cosmological Model: Velocity Evolution")
-plt.legend()
-plt.show()
-
-plt.figure(figsize=(10, 5))
-plt.plot(range(TIME_STEPS), quantum_state_history, label="Avg Quantum State", color="magenta")
-plt.xlabel("Time Steps")
-plt.ylabel("Quantum State")
-plt.title("Unified PRU Cosmological Model: Quantum State Evolution")
-plt.legend()
-plt.show()
+# All five panels in one headless figure written to disk (Agg backend, no blocking show())
+steps = np.arange(TIME_STEPS)
+fig, axes = plt.subplots(3, 2, figsize=(14, 18))
+
+ax = axes[0, 0]
+ax.plot(steps, temperature_history_cosmo, label="Avg Temperature", color="red")
+ax.plot(steps, min_temperature_history, label="Min Temperature", color="blue", linestyle="--")
+ax.plot(steps, max_temperature_history, label="Max Temperature", color="green", linestyle="--")
+ax.set_xlabel("Time Steps")
+ax.set_ylabel("Temperature (K)")
+ax.set_title("Unified PRU Cosmological Model: Temperature Evolution")
+ax.legend()
+
+ax = axes[0, 1]
+ax.plot(steps, entropy_history_cosmo, label="Avg Entropy", color="orange")
+ax.set_xlabel("Time Steps")
+ax.set_ylabel("Entropy (J/K)")
+ax.set_title("Unified PRU Cosmological Model: Entropy Evolution")
+ax.legend()
+
+ax = axes[1, 0]
+ax.plot(steps, phase_history_cosmo, label="Avg Phase (0=Solid,1=Liquid,2=Gas)", color="purple")
+ax.set_xlabel("Time Steps")
+ax.set_ylabel("Phase State")
+ax.set_title("Unified PRU Cosmological Model: Phase Transitions")
+ax.legend()
+
+ax = axes[1, 1]
+ax.plot(steps, velocity_history_cosmo, label="Avg Velocity", color="blue")
+ax.set_xlabel("Time Steps")
+ax.set_ylabel("Velocity (m/s)")
+ax.set_title("Unified PRU Cosmological Model: Velocity Evolution")
+ax.legend()
+
+ax = axes[2, 0]
+ax.plot(steps, quantum_state_history, label="Avg Quantum State", color="magenta")
+ax.set_xlabel("Time Steps")
+ax.set_ylabel("Quantum State")
+ax.set_title("Unified PRU Cosmological Model: Quantum State Evolution")
+ax.legend()
 
+axes[2, 1].axis("off")
+fig.tight_layout()
+fig.savefig("pru_results.png")
+plt.close(fig)
@@ -1,6 +1,7 @@
-from numba import njit, prange
+import math
 import numpy as np
-from scipy.spatial import KDTree
+from numba import njit, prange, cuda
+from scipy.spatial import cKDTree
 import gc
 import matplotlib.pyplot as plt
 
@@ -18,94 +19,343 @@ batch_size = 100
 time_steps = 100
 dt = 1e-12  # Time step
 neighbors = 10  # KDTree neighborhood search
+NEIGHBOR_METHOD = "cells"  # "cells" (uniform cell list, O(N)) or "kdtree" (batched cKDTree query)
+PARTICLES_PER_CELL = 2  # Target cell-list occupancy
+UPDATE_METHOD = "numba"  # "numba" (tiled parallel CPU kernel) or "cuda" (GPU, state kept on the device)
+CUDA_BLOCK = 256  # Threads per block for the CUDA update
+CUDA_REBUILD_EVERY = 10  # CUDA path: steps between host neighbor-list rebuilds
+PRU_TILE = 1024  # Particles per cache-resident tile in the host PRU update
+NEIGHBOR_SKIN = 0.3  # Host path: rebuild neighbors once a particle has moved this fraction of the mean spacing
 
-# Particle Initialization
-positions = np.random.rand(num_particles, 3).astype(np.float32) * 1e-9  # Initial positions (nm scale)
-velocities = ((np.random.rand(num_particles, 3) - 0.5) * c * 0.8).astype(np.float32)  # Random velocities
+# Particle Initialization (structure of arrays: one contiguous array per axis)
+pos_x = np.random.rand(num_particles).astype(np.float32) * 1e-9  # Initial positions (nm scale)
+pos_y = np.random.rand(num_particles).astype(np.float32) * 1e-9
+pos_z = np.random.rand(num_particles).astype(np.float32) * 1e-9
+vel_x = ((np.random.rand(num_particles) - 0.5) * c * 0.8).astype(np.float32)  # Random velocities
+vel_y = ((np.random.rand(num_particles) - 0.5) * c * 0.8).astype(np.float32)
+vel_z = ((np.random.rand(num_particles) - 0.5) * c * 0.8).astype(np.float32)
 masses = np.abs(np.random.randn(num_particles) * 1e-27).astype(np.float32)  # Particle masses
-spins = np.random.choice([-1, 1], size=num_particles)  # Random spin states
+spins = np.random.choice([-1, 1], size=num_particles).astype(np.int8)  # Random spin states (one byte each)
 black_hole_flags = np.zeros(num_particles, dtype=np.int32)  # Black hole tracking
 
 # Initialize neighbor index storage
 neighbor_indices = np.full((num_particles, neighbors), -1, dtype=np.int32)
 
-# Function to update the KDTree and get neighbor indices
+@njit(parallel=True, cache=True)
+def cell_list_neighbors(pos_x, pos_y, pos_z, k, out):
+    """
+    Exact k-nearest neighbors (self included, nearest first) from a uniform cell list.
+    Particles are bucketed into cubic cells sorted by linear cell id; each particle scans
+    rings of cells around its own until the k-th candidate lies within the radius the
+    scanned rings are guaranteed to cover.
+    """
+    n = pos_x.shape[0]
+    x0, y0, z0 = pos_x.min(), pos_y.min(), pos_z.min()
+    span = max(pos_x.max() - x0, pos_y.max() - y0, pos_z.max() - z0, 1e-30)
+    per_axis = max(1, int((n / PARTICLES_PER_CELL) ** (1.0 / 3.0)))
+    cell_size = span / per_axis * (1.0 + 1e-6)
+    nx = int((pos_x.max() - x0) / cell_size) + 1
+    ny = int((pos_y.max() - y0) / cell_size) + 1
+    nz = int((pos_z.max() - z0) / cell_size) + 1
+
+    cx = np.empty(n, dtype=np.int64)
+    cy = np.empty(n, dtype=np.int64)
+    cz = np.empty(n, dtype=np.int64)
+    cell_id = np.empty(n, dtype=np.int64)
+    for i in prange(n):
+        cx[i] = int((pos_x[i] - x0) / cell_size)
+        cy[i] = int((pos_y[i] - y0) / cell_size)
+        cz[i] = int((pos_z[i] - z0) / cell_size)
+        cell_id[i] = (cx[i] * ny + cy[i]) * nz + cz[i]
+    order = np.argsort(cell_id)
+    cell_start = np.zeros(nx * ny * nz + 1, dtype=np.int64)
+    for i in range(n):
+        cell_start[cell_id[i] + 1] += 1
+    cell_start = np.cumsum(cell_start)
+
+    max_ring = max(nx, ny, nz)
+    for i in prange(n):
+        best_d = np.full(k, np.inf)
+        best_j = np.full(k, -1, dtype=np.int64)
+        px, py, pz = pos_x[i], pos_y[i], pos_z[i]
+        r = 0
+        while True:
+            for ax in range(max(cx[i] - r, 0), min(cx[i] + r, nx - 1) + 1):
+                for ay in range(max(cy[i] - r, 0), min(cy[i] + r, ny - 1) + 1):
+                    for az in range(max(cz[i] - r, 0), min(cz[i] + r, nz - 1) + 1):
+                        if max(abs(ax - cx[i]), abs(ay - cy[i]), abs(az - cz[i])) != r:
+                            continue  # Inner rings were scanned already
+                        c = (ax * ny + ay) * nz + az
+                        for s in range(cell_start[c], cell_start[c + 1]):
+                            j = order[s]
+                            dx = pos_x[j] - px
+                            dy = pos_y[j] - py
+                            dz = pos_z[j] - pz
+                            d2 = dx * dx + dy * dy + dz * dz
+                            if d2 >= best_d[k - 1]:
+                                continue
+                            # Insertion into the sorted k-best list
+                            m = k - 1
+                            while m > 0 and best_d[m - 1] > d2:
+                                best_d[m] = best_d[m - 1]
+                                best_j[m] = best_j[m - 1]
+                                m -= 1
+                            best_d[m] = d2
+                            best_j[m] = j
+            # Rings 0..r cover every point within r cells of particle i
+            covered = r * cell_size
+            if best_d[k - 1] <= covered * covered or r >= max_ring:
+                break
+            r += 1
+        for m in range(k):
+            out[i, m] = best_j[m]
+
+# Positions and skin distance recorded at the last neighbor-list build
+_last_build = {}
+
+# Function to update the neighbor indices (cell list or KD-tree, one batched call either way)
 def update_neighbor_indices():
-    kdtree = KDTree(positions)  # Build KDTree for fast nearest-neighbor search
-    for i in range(num_particles):
-        neighbors_found = kdtree.query(positions[i], k=neighbors)[1]
-        neighbor_indices[i, : len(neighbors_found)] = neighbors_found
+    if NEIGHBOR_METHOD == "cells":
+        cell_list_neighbors(pos_x, pos_y, pos_z, neighbors, neighbor_indices)
+    else:
+        points = np.column_stack((pos_x, pos_y, pos_z))
+        _, neighbor_indices[:] = cKDTree(points).query(points, k=neighbors, workers=-1)
+
+    extent = [max(float(a.max() - a.min()), epsilon) for a in (pos_x, pos_y, pos_z)]
+    mean_spacing = (extent[0] * extent[1] * extent[2] / num_particles) ** (1.0 / 3.0)
+    _last_build["skin"] = NEIGHBOR_SKIN * mean_spacing
+    for name, arr in (("pos_x", pos_x), ("pos_y", pos_y), ("pos_z", pos_z)):
+        _last_build[name] = arr.copy()
+
+# Verlet-list style check: the cached neighbor list is reused until some particle has
+# drifted further than the skin distance from where it was at the last build
+def neighbors_stale():
+    dx = pos_x - _last_build["pos_x"]
+    dy = pos_y - _last_build["pos_y"]
+    dz = pos_z - _last_build["pos_z"]
+    return np.sqrt((dx * dx + dy * dy + dz * dz).max()) > _last_build["skin"]
 
 # Precompute initial neighbor indices
 update_neighbor_indices()
 
-@njit(parallel=True)
-def update_pru_quantum_relativity(positions, velocities, masses, spins, dt, num_particles, neighbor_indices):
-    """PRU model update with quantum entanglement, spin correlation, and relativistic effects."""
+@njit(parallel=True, fastmath=True, boundscheck=False, cache=True)
+def update_pru_quantum_relativity(pos_x, pos_y, pos_z, vel_x, vel_y, vel_z, masses, spins, black_hole_flags,
+                                  dt, num_particles, neighbor_indices):
+    """
+    PRU model update with quantum entanglement, spin correlation, and relativistic effects.
+    The first pass only reads the start-of-step positions (so the result does not depend on
+    thread order); the second applies the velocity/position updates in place. The kinetic
+    and neighbor potential energy are accumulated in the same passes as per-thread reductions.
+    Both passes run over tiles of PRU_TILE particles, one tile per thread, so a tile's
+    state stays cache-resident while it is processed. Each neighbor's position, mass and
+    spin are gathered once and shared by the distance, potential and spin terms.
+    """
     entanglement_correlations = np.zeros(num_particles)
     time_dilation_factors = np.zeros(num_particles)
+    dv = np.zeros(num_particles)
+    inv_c2 = 1.0 / (c * c)
+    inv_1e9 = 1.0 / 1e-9
+    neg_G_dt = -G * dt
 
-    for i in prange(num_particles):
-        if black_hole_flags[i]:  # Black hole formation stops movement
-            continue
+    n_tiles = (num_particles + PRU_TILE - 1) // PRU_TILE
+    potential_E = 0.0
+    for tile in prange(n_tiles):
+        tile_pe = 0.0
+        for i in range(tile * PRU_TILE, min((tile + 1) * PRU_TILE, num_particles)):
+            px = pos_x[i]
+            py = pos_y[i]
+            pz = pos_z[i]
+            s_i = spins[i]
+            spin_correlation = 0.0
+            mass_sum = 0.0
+            pe = 0.0
+            for j in range(neighbors):
+                neighbor = neighbor_indices[i, j]
+                if neighbor == -1:
+                    continue
+                m_j = masses[neighbor]
+                mass_sum += m_j
+                dx = px - pos_x[neighbor]
+                dy = py - pos_y[neighbor]
+                dz = pz - pos_z[neighbor]
+                distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+                pe += m_j / max(distance, epsilon)  # Clamp prevents division by zero
+                if neighbor == i:
+                    continue
+                # Quantum entanglement spin correlation
+                correlation = math.cos(distance * inv_1e9 * 0.5)
+                spin_correlation += s_i * spins[neighbor] * correlation * correlation
+            tile_pe -= G * masses[i] * pe
 
-        spin_correlation = 0.0
-        for j in range(neighbors):
-            neighbor = neighbor_indices[i, j]
-            if neighbor == -1 or neighbor == i:
+            if black_hole_flags[i]:  # Black hole formation stops movement
                 continue
+            entanglement_correlations[i] = spin_correlation / max(1, neighbors)
 
-            # Quantum entanglement spin correlation
-            angle_diff = np.linalg.norm(positions[i] - positions[neighbor]) / 1e-9
-            correlation = np.cos(angle_diff / 2) ** 2
-            spin_correlation += spins[i] * spins[neighbor] * correlation
+            # Relativistic time dilation factor
+            velocity_squared = vel_x[i] * vel_x[i] + vel_y[i] * vel_y[i] + vel_z[i] * vel_z[i]
+            gamma = 1.0 / math.sqrt(1.0 - velocity_squared * inv_c2)
+            time_dilation_factors[i] = gamma
+            dv[i] = neg_G_dt * mass_sum / (px * px + py * py + pz * pz + epsilon) * gamma
+        potential_E += tile_pe
 
-        entanglement_correlations[i] = spin_correlation / max(1, neighbors)
+    # Update velocity and position
+    kinetic_E = 0.0
+    for tile in prange(n_tiles):
+        tile_ke = 0.0
+        for i in range(tile * PRU_TILE, min((tile + 1) * PRU_TILE, num_particles)):
+            if not black_hole_flags[i]:
+                vel_x[i] += dv[i]
+                vel_y[i] += dv[i]
+                vel_z[i] += dv[i]
+                pos_x[i] += vel_x[i] * dt
+                pos_y[i] += vel_y[i] * dt
+                pos_z[i] += vel_z[i] * dt
+            tile_ke += 0.5 * masses[i] * (vel_x[i] * vel_x[i] + vel_y[i] * vel_y[i] + vel_z[i] * vel_z[i])
+        kinetic_E += tile_ke
+
+    return entanglement_correlations, time_dilation_factors, kinetic_E, potential_E
+
+@cuda.jit(fastmath=True)
+def pru_update_kernel(pos_x, pos_y, pos_z, vel_x, vel_y, vel_z, masses, spins, black_hole_flags,
+                      neighbor_indices, dt, pos_x_out, pos_y_out, pos_z_out, vel_x_out, vel_y_out, vel_z_out,
+                      entanglement_correlations, time_dilation_factors, kinetic, potential):
+    """
+    One thread per particle: the same update as update_pru_quantum_relativity, reading the
+    start-of-step state and writing the new one to the *_out buffers. Also writes each
+    particle's kinetic energy and its share of the neighbor potential energy, so the host
+    never needs the positions to track energy.
+    """
+    i = cuda.grid(1)
+    if i >= pos_x.shape[0]:
+        return
+    px = pos_x[i]
+    py = pos_y[i]
+    pz = pos_z[i]
+    vx = vel_x[i]
+    vy = vel_y[i]
+    vz = vel_z[i]
+    m_i = masses[i]
+    s_i = spins[i]
+
+    spin_correlation = 0.0
+    mass_sum = 0.0
+    pe = 0.0
+    for j in range(neighbors):
+        neighbor = neighbor_indices[i, j]
+        if neighbor == -1:
+            continue
+        mass_sum += masses[neighbor]
+        dx = px - pos_x[neighbor]
+        dy = py - pos_y[neighbor]
+        dz = pz - pos_z[neighbor]
+        distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+        pe -= G * m_i * masses[neighbor] / max(distance, epsilon)
+        if neighbor == i:
+            continue
+        correlation = math.cos(distance / 1e-9 / 2)
+        spin_correlation += s_i * spins[neighbor] * correlation * correlation
+    potential[i] = pe
 
-        # Relativistic time dilation factor
-        velocity_squared = np.sum(velocities[i] ** 2)
-        gamma = 1 / np.sqrt(1 - velocity_squared / c ** 2)
+    if black_hole_flags[i]:  # Black hole formation stops movement
+        entanglement_correlations[i] = 0.0
+        time_dilation_factors[i] = 0.0
+    else:
+        entanglement_correlations[i] = spin_correlation / max(1, neighbors)
+        velocity_squared = vx * vx + vy * vy + vz * vz
+        gamma = 1.0 / math.sqrt(1.0 - velocity_squared / (c * c))
         time_dilation_factors[i] = gamma
+        dv = -G * mass_sum / (px * px + py * py + pz * pz + epsilon) * dt * gamma
+        vx += dv
+        vy += dv
+        vz += dv
+        px += vx * dt
+        py += vy * dt
+        pz += vz * dt
+    pos_x_out[i] = px
+    pos_y_out[i] = py
+    pos_z_out[i] = pz
+    vel_x_out[i] = vx
+    vel_y_out[i] = vy
+    vel_z_out[i] = vz
+    kinetic[i] = 0.5 * m_i * (vx * vx + vy * vy + vz * vz)
+
+# Device state, uploaded on the first call and kept resident across steps
+_cuda_state = {}
+
+def update_pru_quantum_relativity_cuda(dt, rebuild):
+    """
+    Runs one PRU step on the GPU. Positions and velocities stay on the device (ping-pong
+    buffers); they are copied back only when `rebuild` asks for a host neighbor-list rebuild.
+    Returns the entanglement and time-dilation arrays and the step's kinetic/potential energy.
+    """
+    d = _cuda_state
+    if not d:
+        for name, arr in (("pos_x", pos_x), ("pos_y", pos_y), ("pos_z", pos_z),
+                          ("vel_x", vel_x), ("vel_y", vel_y), ("vel_z", vel_z)):
+            d[name] = cuda.to_device(arr)
+            d[name + "_out"] = cuda.device_array_like(arr)
+        d["masses"] = cuda.to_device(masses)
+        d["spins"] = cuda.to_device(spins)
+        d["black_hole_flags"] = cuda.to_device(black_hole_flags)
+        d["neighbor_indices"] = cuda.to_device(neighbor_indices)
+        for name in ("entanglement", "time_dilation", "kinetic", "potential"):
+            d[name] = cuda.device_array(num_particles)
+    elif rebuild:
+        sync_from_device()
+        update_neighbor_indices()
+        d["neighbor_indices"].copy_to_device(neighbor_indices)
+
+    blocks = (num_particles + CUDA_BLOCK - 1) // CUDA_BLOCK
+    pru_update_kernel[blocks, CUDA_BLOCK](
+        d["pos_x"], d["pos_y"], d["pos_z"], d["vel_x"], d["vel_y"], d["vel_z"],
+        d["masses"], d["spins"], d["black_hole_flags"], d["neighbor_indices"], dt,
+        d["pos_x_out"], d["pos_y_out"], d["pos_z_out"], d["vel_x_out"], d["vel_y_out"], d["vel_z_out"],
+        d["entanglement"], d["time_dilation"], d["kinetic"], d["potential"])
+    for name in ("pos_x", "pos_y", "pos_z", "vel_x", "vel_y", "vel_z"):
+        d[name], d[name + "_out"] = d[name + "_out"], d[name]
 
-        # Update velocity and position
-        acceleration = -G * np.sum(masses[neighbor_indices[i]]) / (np.linalg.norm(positions[i]) ** 2 + epsilon)
-        velocities[i] += acceleration * dt * gamma
-        positions[i] += velocities[i] * dt
+    return (d["entanglement"].copy_to_host(), d["time_dilation"].copy_to_host(),
+            d["kinetic"].copy_to_host().sum(), d["potential"].copy_to_host().sum())
 
-    return positions, velocities, entanglement_correlations, time_dilation_factors
+def sync_from_device():
+    """Copies the device-resident positions and velocities back into the host arrays."""
+    d = _cuda_state
+    for name, arr in (("pos_x", pos_x), ("pos_y", pos_y), ("pos_z", pos_z),
+                      ("vel_x", vel_x), ("vel_y", vel_y), ("vel_z", vel_z)):
+        d[name].copy_to_host(arr)
 
-# Results Storage
-entanglement_history = []
-time_dilation_history = []
-total_kinetic_energy = []
-total_potential_energy = []
-total_energy = []
+# Results Storage (one preallocated slot per time step)
+entanglement_history = np.empty(time_steps)
+time_dilation_history = np.empty(time_steps)
+total_kinetic_energy = np.empty(time_steps)
+total_potential_energy = np.empty(time_steps)
 
 # Run PRU Simulation
 for t in range(time_steps):
-    # Update neighbor database each iteration
-    update_neighbor_indices()
-
-    # Compute PRU quantum-relativistic updates
-    positions, velocities, entanglement_correlations, time_dilation_factors = update_pru_quantum_relativity(
-        positions, velocities, masses, spins, dt, num_particles, neighbor_indices
-    )
-
-    # Compute energy conservation with epsilon correction
-    kinetic_E = 0.5 * np.sum(masses * np.sum(velocities**2, axis=1))
-    
-    # Fix division by zero issue
-    distances = np.linalg.norm(positions[:, None] - positions[neighbor_indices], axis=-1)
-    distances[distances < epsilon] = epsilon  # Prevent division by zero
-
-    potential_E = -np.sum(G * masses[:, None] * masses[neighbor_indices] / distances)
-    
-    total_kinetic_energy.append(kinetic_E)
-    total_potential_energy.append(potential_E)
-    total_energy.append(kinetic_E + potential_E)
-
-    entanglement_history.append(np.mean(entanglement_correlations))
-    time_dilation_history.append(np.mean(time_dilation_factors))
+    if UPDATE_METHOD == "numba":
+        # Update neighbor database only once particles have moved past the skin
+        if neighbors_stale():
+            update_neighbor_indices()
+
+        # Compute PRU quantum-relativistic updates (energy included)
+        entanglement_correlations, time_dilation_factors, kinetic_E, potential_E = update_pru_quantum_relativity(
+            pos_x, pos_y, pos_z, vel_x, vel_y, vel_z, masses, spins, black_hole_flags, dt, num_particles,
+            neighbor_indices
+        )
+    else:
+        entanglement_correlations, time_dilation_factors, kinetic_E, potential_E = \
+            update_pru_quantum_relativity_cuda(dt, rebuild=(t % CUDA_REBUILD_EVERY == 0))
+
+    total_kinetic_energy[t] = kinetic_E
+    total_potential_energy[t] = potential_E
+
+    entanglement_history[t] = entanglement_correlations.mean()
+    time_dilation_history[t] = time_dilation_factors.mean()
+
+total_energy = total_kinetic_energy + total_potential_energy
+
+if UPDATE_METHOD == "cuda":
+    sync_from_device()
 
 # Cleanup
 gc.collect()
@@ -1,62 +1,65 @@
 # PRU Simulation Engine - Relational Update Based Universe
 
 import random
-import math
 import time
+import numpy as np
 import networkx as nx
+from scipy.spatial import cKDTree
 import matplotlib.pyplot as plt
 
-# --- Core Entity ---
-class Entity:
-    def __init__(self, id, position):
-        self.id = id
-        self.position = position  # (x, y)
-        self.state = 'stable'
-        self.energy = random.uniform(0.1, 1.0)
-        self.relations = []  # Other entity IDs it relates to
-
-    def distance_to(self, other):
-        dx = self.position[0] - other.position[0]
-        dy = self.position[1] - other.position[1]
-        return math.sqrt(dx**2 + dy**2)
+rng = np.random.default_rng()
 
 # --- Universe Engine ---
+# Entities are stored as structure-of-arrays indexed by entity id: positions in an (N, 2)
+# array, energies in an (N,) array, and relations as a CSR neighbor list (indptr, indices).
 class Universe:
     def __init__(self, size=100, num_entities=20):
-        self.entities = {}
+        self.pos = np.empty((num_entities, 2))
+        self.energy = np.empty(num_entities)
         for i in range(num_entities):
-            pos = (random.uniform(0, size), random.uniform(0, size))
-            self.entities[i] = Entity(i, pos)
+            self.pos[i] = (random.uniform(0, size), random.uniform(0, size))
+            self.energy[i] = random.uniform(0.1, 1.0)
         self.graph = nx.Graph()
+        for i, p in enumerate(self.pos.tolist()):
+            self.graph.add_node(i, pos=tuple(p))
+        self.current_edges = set()
         self.update_graph()
 
     def update_graph(self):
-        self.graph.clear()
-        for entity in self.entities.values():
-            self.graph.add_node(entity.id, pos=entity.position)
-
-        # Create relations based on distance (event-driven)
+        # Create relations based on distance (event-driven): the tree returns only the close pairs
         threshold = 25.0
-        for a in self.entities.values():
-            for b in self.entities.values():
-                if a.id != b.id:
-                    dist = a.distance_to(b)
-                    if dist < threshold:
-                        self.graph.add_edge(a.id, b.id, weight=1.0/dist)
-                        if b.id not in a.relations:
-                            a.relations.append(b.id)
+        pairs = cKDTree(self.pos).query_pairs(threshold, output_type='ndarray')
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        diff = self.pos[pairs[:, 0]] - self.pos[pairs[:, 1]]
+        dist = np.sqrt(diff[:, 0]**2 + diff[:, 1]**2)
+        close = dist < threshold
+        pairs, dist = pairs[close], dist[close]
+
+        # Only touch the edges that changed since the last update; nodes stay in the graph.
+        # Entities never move after init, so the weights of kept edges are still current.
+        new_edges = set(map(tuple, pairs.tolist()))
+        self.graph.remove_edges_from(self.current_edges - new_edges)
+        self.graph.add_edges_from((i, j, {'weight': 1.0/d}) for (i, j), d in zip(pairs.tolist(), dist.tolist())
+                                  if (i, j) not in self.current_edges)
+        self.current_edges = new_edges
+
+        # Relations in both directions, rows sorted by (source, target) id
+        both = np.concatenate((pairs, pairs[:, ::-1]))
+        both = both[np.lexsort((both[:, 1], both[:, 0]))]
+        self.indices = both[:, 1]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(both[:, 0], minlength=len(self.pos)))))
 
     def simulate_tick(self):
-        updated = []
-        for entity in self.entities.values():
-            for related_id in entity.relations:
-                related = self.entities[related_id]
-                dist = entity.distance_to(related)
-                delta_energy = random.uniform(-0.05, 0.05)
-                if dist < 15:
-                    entity.energy += delta_energy
-                    related.energy -= delta_energy
-                    updated.append((entity.id, related.id))
+        src = np.repeat(np.arange(len(self.pos)), np.diff(self.indptr))
+        dst = self.indices
+        diff = self.pos[src] - self.pos[dst]
+        dist = np.sqrt(diff[:, 0]**2 + diff[:, 1]**2)
+        close = dist < 15
+        src, dst = src[close], dst[close]
+        delta_energy = rng.uniform(-0.05, 0.05, len(src))
+        np.add.at(self.energy, src, delta_energy)
+        np.add.at(self.energy, dst, -delta_energy)
+        updated = list(zip(src.tolist(), dst.tolist()))
         self.update_graph()
         return updated
 
@@ -69,15 +72,21 @@ class Universe:
 # --- Run Simulation ---
 def run_simulation():
     universe = Universe(size=100, num_entities=15)
-    plt.ion()
-    plt.figure(figsize=(8, 6))
+    # The graph is only redrawn for on-screen viewing, never under a headless (Agg) backend
+    visualize = plt.get_backend().lower() != 'agg'
+    if visualize:
+        plt.ion()
+        plt.figure(figsize=(8, 6))
     for i in range(100):
         updates = universe.simulate_tick()
-        universe.draw()
+        if visualize:
+            universe.draw()
         print(f"Tick {i+1}: {len(updates)} relations updated.")
-        time.sleep(0.2)
-    plt.ioff()
-    plt.show()
+        if visualize:
+            time.sleep(0.2)
+    if visualize:
+        plt.ioff()
+        plt.show()
 
 if __name__ == '__main__':
     run_simulation()
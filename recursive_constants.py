@@ -1,4 +1,5 @@
 import numpy as np
+from numba import njit
 import matplotlib.pyplot as plt
 
 # Known physical constants as initial seed values
@@ -22,34 +23,55 @@ e_init = expected_e
 # Number of iterations
 iterations = 100000
 damping_factor = 0.0000001  # To stabilize iterations
+tolerance = 1e-15  # Stop early once no constant moves by more than this (relative) in one step
 
-# Arrays to store values over iterations
-G_vals = [G_init]
-alpha_vals = [alpha_init]
-Lambda_vals = [Lambda_init]
-e_vals = [e_init]
+@njit(cache=True)
+def iterate_constants(G0, alpha0, Lambda0, e0, n_iter, damping, tol):
+    """
+    Runs the damped fixed-point iteration with scalar state, writing each step into
+    preallocated arrays. Returns the arrays trimmed to the steps actually taken.
+    """
+    sqrt_N = np.sqrt(N)
+    c_hbar = c * hbar
+    e_numerator = 4 * np.pi * c ** 2 * hbar ** 2 * eps0
+
+    G_vals = np.empty(n_iter + 1)
+    alpha_vals = np.empty(n_iter + 1)
+    Lambda_vals = np.empty(n_iter + 1)
+    e_vals = np.empty(n_iter + 1)
+    G_vals[0], alpha_vals[0], Lambda_vals[0], e_vals[0] = G0, alpha0, Lambda0, e0
+    G_cur, alpha_cur, Lambda_cur, e_cur = G0, alpha0, Lambda0, e0
+
+    n = 0
+    while n < n_iter:
+        G_new = c_hbar / (Lambda_cur * alpha_cur * sqrt_N)
+        alpha_new = c_hbar / (G_cur * Lambda_cur * sqrt_N)
+        Lambda_new = c_hbar / (G_cur * sqrt_N * alpha_cur)
+        e_new = np.sqrt(e_numerator / (G_cur * Lambda_cur * sqrt_N))
+
+        # Apply adaptive damping factor to allow controlled convergence
+        G_next = G_cur + damping * (G_new - G_cur)
+        alpha_next = alpha_cur + damping * (alpha_new - alpha_cur)
+        Lambda_next = Lambda_cur + damping * (Lambda_new - Lambda_cur)
+        e_next = e_cur + damping * (e_new - e_cur)
+
+        n += 1
+        G_vals[n], alpha_vals[n], Lambda_vals[n], e_vals[n] = G_next, alpha_next, Lambda_next, e_next
+
+        # Fixed point reached: further iterations would not change anything
+        if (abs(G_next - G_cur) <= tol * abs(G_cur) and abs(alpha_next - alpha_cur) <= tol * abs(alpha_cur)
+                and abs(Lambda_next - Lambda_cur) <= tol * abs(Lambda_cur) and abs(e_next - e_cur) <= tol * abs(e_cur)):
+            break
+        G_cur, alpha_cur, Lambda_cur, e_cur = G_next, alpha_next, Lambda_next, e_next
+
+    return G_vals[:n + 1], alpha_vals[:n + 1], Lambda_vals[:n + 1], e_vals[:n + 1]
 
 # Recursive iteration process
-for _ in range(iterations):
-    G_new = (c * hbar) / ((Lambda_vals[-1]) * (alpha_vals[-1]) * np.sqrt(N))
-    alpha_new = (c * hbar) / ((G_vals[-1]) * (Lambda_vals[-1]) * np.sqrt(N))
-    Lambda_new = (c * hbar) / ((G_vals[-1]) * np.sqrt(N) * (alpha_vals[-1]))
-    e_new = np.sqrt((4 * np.pi * c ** 2 * hbar ** 2 * eps0) / ((G_vals[-1]) * (Lambda_vals[-1]) * np.sqrt(N)))
-
-    # Apply adaptive damping factor to allow controlled convergence
-    G_next = G_vals[-1] + damping_factor * (G_new - G_vals[-1])
-    alpha_next = alpha_vals[-1] + damping_factor * (alpha_new - alpha_vals[-1])
-    Lambda_next = Lambda_vals[-1] + damping_factor * (Lambda_new - Lambda_vals[-1])
-    e_next = e_vals[-1] + damping_factor * (e_new - e_vals[-1])
-
-    # Append new values
-    G_vals.append(G_next)
-    alpha_vals.append(alpha_next)
-    Lambda_vals.append(Lambda_next)
-    e_vals.append(e_next)
+G_vals, alpha_vals, Lambda_vals, e_vals = iterate_constants(
+    G_init, alpha_init, Lambda_init, e_init, iterations, damping_factor, tolerance)
 
 # Print final results
-print(f"AFTER THIS MANY ITERATIONS :{iterations}")
+print(f"AFTER THIS MANY ITERATIONS :{len(G_vals) - 1}")
 print(f"Final G: {G_vals[-1]} (Expected: {expected_G})")
 print(f"Final α: {alpha_vals[-1]} (Expected: {expected_alpha})")
 print(f"Final Λ: {Lambda_vals[-1]} (Expected: {expected_Lambda})")